@@ -0,0 +1,129 @@
+import csv
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Iterator
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".data")
+TABLE = "bench_rows"
+# mongo_schema.json 형식의 schema (rdb2mongo, csvfile2mongo, store2csv에서 사용)
+SCHEMA = {
+    "id": "int64",
+    "code": "string",
+    "title": "string",
+    "score": "double",
+    "count": "int32",
+    "active": "boolean",
+    "created": "date",
+}
+# dataframe()에서 csv를 읽을 때의 컬럼 타입 (iter_rows 값의 python 타입과 같게)
+_CSV_TYPES = {
+    "id": "int64",
+    "code": "string",
+    "title": "string",
+    "score": "float64",
+    "count": "int64",
+    "active": "bool",
+    "created": "string",
+}
+_BASE_DATE = datetime(2024, 1, 1)
+_WRITE_CHUNK = 100_000
+
+
+def make_row(i: int) -> tuple:
+    """
+    id로 값이 정해지는 row (실행할 때마다 같은 데이터)
+    """
+    return (
+        i,
+        f"KR{i:010d}",
+        f"benchmark document {i % 9973} title {i % 97}",
+        (i * 7919 % 100_000) / 100,
+        i * 104729 % 2_000_000_000,
+        i % 3 == 0,
+        (_BASE_DATE + timedelta(seconds=i * 37 % 31_536_000)).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        ),
+    )
+
+
+def iter_rows(n_rows: int) -> Iterator[tuple]:
+    for i in range(n_rows):
+        yield make_row(i)
+
+
+def sqlite_dataset(n_rows: int, data_dir: str = DATA_DIR) -> str:
+    """
+    n_rows 개의 row가 있는 SQLite 파일 (MariaDB 대신 사용, 한번 만들면 재사용)
+
+    Returns:
+        str: SQLite 파일 경로
+    """
+    path = os.path.join(data_dir, f"rows_{n_rows}.sqlite")
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(data_dir, exist_ok=True)
+    temp_path = path + ".tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    conn = sqlite3.connect(temp_path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(
+            f"CREATE TABLE {TABLE} (id INTEGER PRIMARY KEY, code TEXT, title TEXT,"
+            " score REAL, count INTEGER, active INTEGER, created TEXT)"
+        )
+        rows = iter_rows(n_rows)
+        while True:
+            chunk = [row for _, row in zip(range(_WRITE_CHUNK), rows)]
+            if not chunk:
+                break
+            conn.executemany(f"INSERT INTO {TABLE} VALUES (?, ?, ?, ?, ?, ?, ?)", chunk)
+        conn.commit()
+    finally:
+        conn.close()
+    # 만드는 도중 중단된 파일은 재사용하지 않도록 완성된 뒤 이름 변경
+    os.replace(temp_path, path)
+    return path
+
+
+def csv_dataset(n_rows: int, data_dir: str = DATA_DIR) -> str:
+    """
+    n_rows 개의 row가 있는 header 없는 csv 파일 (SCHEMA 컬럼 순서, 한번 만들면 재사용)
+
+    Returns:
+        str: csv 파일 경로
+    """
+    path = os.path.join(data_dir, f"rows_{n_rows}.csv")
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(data_dir, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        for row in iter_rows(n_rows):
+            writer.writerow((*row[:5], "true" if row[5] else "false", *row[6:]))
+    os.replace(temp_path, path)
+    return path
+
+
+def dataframe(n_rows: int, data_dir: str = DATA_DIR):
+    """
+    n_rows 개의 row가 있는 DataFrame (RDB에서 읽어온 결과와 같은 형태)
+
+    python tuple 대신 csv_dataset 파일을 arrow로 읽어 만들므로 큰 데이터(10M, 50M)도
+    빠르게 만들 수 있고, 만드는 도중 생기는 임시 메모리도 적다.
+    """
+    from pyarrow import csv as pa_csv
+
+    table = pa_csv.read_csv(
+        csv_dataset(n_rows, data_dir),
+        read_options=pa_csv.ReadOptions(column_names=list(SCHEMA.keys())),
+        # created는 RDB(TEXT 컬럼)에서 읽은 것처럼 문자열 그대로 사용
+        convert_options=pa_csv.ConvertOptions(column_types=_CSV_TYPES),
+    )
+    # 변환이 끝난 arrow 컬럼은 바로 해제하여 peak 메모리를 줄임
+    return table.to_pandas(split_blocks=True, self_destruct=True)
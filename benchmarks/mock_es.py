@@ -0,0 +1,255 @@
+import fnmatch
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ES_VERSION = "7.17.0"
+# family 하나의 index 버전 수 (최신 버전 바로 전 index에 alias가 걸려 있음)
+DEFAULT_VERSIONS = 5
+LOCALES = ("ko", "en", "ja")
+CAT_INDICES_COLUMNS = (
+    "index",
+    "health",
+    "status",
+    "docs.count",
+    "store.size",
+    "creation.date",
+)
+
+
+def family_count(n_indices: int, versions: int = DEFAULT_VERSIONS) -> int:
+    return -(-n_indices // versions)
+
+
+def family_name(family: int) -> str:
+    return f"bench{family:06d}_{LOCALES[family % len(LOCALES)]}"
+
+
+def family_indices(
+    family: int, n_indices: int, versions: int = DEFAULT_VERSIONS
+) -> list[str]:
+    """
+    family의 index 목록 (최신 순)
+    """
+    count = min(versions, n_indices - family * versions)
+    return [
+        f"{20240101 + version}_{family_name(family)}"
+        for version in reversed(range(count))
+    ]
+
+
+def alias_switches(
+    n_indices: int, versions: int = DEFAULT_VERSIONS, limit: int = None
+) -> list[tuple[str, str, list[str]]]:
+    """
+    family alias를 최신 index로 옮기는 (old_index, new_index, aliases) 목록
+
+    cluster를 만들지 않고 이름 규칙으로만 계산한다. (benchmark process 메모리에 영향 없음)
+    """
+    switches = []
+    for family in range(family_count(n_indices, versions)):
+        indices = family_indices(family, n_indices, versions)
+        if len(indices) < 2:
+            continue
+        switches.append((indices[1], indices[0], [family_name(family)]))
+        if limit is not None and len(switches) >= limit:
+            break
+    return switches
+
+
+class SyntheticCluster:
+    """
+    이름 규칙(20240101_bench000001_ko)을 따르는 index n_indices 개의 가짜 cluster
+
+    같은 n_indices, versions 이면 항상 같은 cluster가 만들어진다.
+    family 마다 최신 버전 바로 전 index에 alias가 있고, 10번째 family 마다
+    최신 index에 dev alias가 있다. (alias 전환 대상: 최신 index)
+
+    Args:
+        n_indices (int): index 수 (시스템 index 제외)
+        versions (int): family 하나의 index 수
+    """
+
+    def __init__(self, n_indices: int, versions: int = DEFAULT_VERSIONS):
+        self.n_indices = n_indices
+        self.versions = versions
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.indices: dict[str, dict] = {}
+            for i in range(self.n_indices):
+                family, version = divmod(i, self.versions)
+                name = f"{20240101 + version}_{family_name(family)}"
+                self.indices[name] = {
+                    "aliases": set(),
+                    "docs": (i * 7919) % 1_000_000,
+                    "size": ((i * 104729) % 10_000) * 1024**2,
+                    # 하루 간격으로 생성된 것으로 처리 (ms)
+                    "created": 1704067200000 + version * 86400000,
+                }
+            for family in range(self.families):
+                latest, *previous = self.family_indices(family)
+                for index in previous[:1]:
+                    self.indices[index]["aliases"].add(family_name(family))
+                if family % 10 == 0:
+                    self.indices[latest]["aliases"].add(f"{family_name(family)}_dev")
+            self.indices[".kibana_1"] = {
+                "aliases": {".kibana"},
+                "docs": 1,
+                "size": 1024,
+                "created": 1704067200000,
+            }
+            self._responses: dict[str, bytes] = {}
+
+    @property
+    def families(self) -> int:
+        return family_count(self.n_indices, self.versions)
+
+    def family_indices(self, family: int) -> list[str]:
+        return family_indices(family, self.n_indices, self.versions)
+
+    def response(self, path: str, query: dict) -> tuple[int, bytes]:
+        # 같은 요청은 cluster가 바뀌기 전까지 직렬화된 응답을 재사용
+        key = path + "?" + json.dumps(query, sort_keys=True)
+        with self.lock:
+            body = self._responses.get(key)
+            if body is not None:
+                return 200, body
+            status, data = self._render(path, query)
+            body = json.dumps(data).encode()
+            if status == 200:
+                self._responses[key] = body
+        return status, body
+
+    def _render(self, path: str, query: dict) -> tuple[int, object]:
+        if path == "":
+            return 200, {"version": {"number": ES_VERSION}}
+        if path == "_alias":
+            return 200, {
+                index: {"aliases": {alias: {} for alias in sorted(v["aliases"])}}
+                for index, v in self.indices.items()
+            }
+        if path == "_cat/aliases":
+            return 200, [
+                {"alias": alias, "index": index}
+                for index, v in sorted(self.indices.items(), reverse=True)
+                for alias in sorted(v["aliases"])
+            ]
+        if path == "_cat/indices" or path.startswith("_cat/indices/"):
+            patterns = path[len("_cat/indices/") :].split(",")
+            columns = query.get("h", [",".join(CAT_INDICES_COLUMNS)])[0].split(",")
+            rows = []
+            for index, v in sorted(self.indices.items(), reverse=True):
+                if path != "_cat/indices" and not any(
+                    fnmatch.fnmatch(index, pattern) for pattern in patterns
+                ):
+                    continue
+                row = {
+                    "index": index,
+                    "health": "green",
+                    "status": "open",
+                    "docs.count": str(v["docs"]),
+                    "store.size": str(v["size"]),
+                    "creation.date": str(v["created"]),
+                }
+                rows.append({column: row.get(column) for column in columns})
+            return 200, rows
+        if path.endswith("/_alias"):
+            index = path[: -len("/_alias")]
+            if index not in self.indices:
+                return 404, _not_found(index)
+            aliases = self.indices[index]["aliases"]
+            return 200, {index: {"aliases": {alias: {} for alias in aliases}}}
+        return 404, {"error": f"unsupported path: {path}", "status": 404}
+
+    def update_aliases(self, actions: list[dict]) -> tuple[int, dict]:
+        with self.lock:
+            for action in actions:
+                for body in action.values():
+                    if body["index"] not in self.indices:
+                        return 404, _not_found(body["index"])
+            for action in actions:
+                for kind, body in action.items():
+                    aliases = self.indices[body["index"]]["aliases"]
+                    if kind == "add":
+                        aliases.add(body["alias"])
+                    else:
+                        aliases.discard(body["alias"])
+            self._responses.clear()
+        return 200, {"acknowledged": True}
+
+    def delete_indices(self, names: list[str]) -> tuple[int, dict]:
+        with self.lock:
+            missing = [name for name in names if name not in self.indices]
+            if missing:
+                return 404, _not_found(missing[0])
+            for name in names:
+                self.indices.pop(name)
+            self._responses.clear()
+        return 200, {"acknowledged": True}
+
+
+def _not_found(index: str) -> dict:
+    return {
+        "error": {"type": "index_not_found_exception", "index": index},
+        "status": 404,
+    }
+
+
+def _handler(cluster: SyntheticCluster):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # header와 body를 따로 쓰므로 delayed ACK로 요청마다 지연되지 않도록 함
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: bytes | dict):
+            if isinstance(body, dict):
+                body = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self) -> dict:
+            length = int(self.headers.get("Content-Length", 0))
+            return json.loads(self.rfile.read(length)) if length else {}
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            self._send(*cluster.response(url.path.strip("/"), parse_qs(url.query)))
+
+        def do_POST(self):
+            path = urlparse(self.path).path.strip("/")
+            body = self._read_json()
+            if path == "_aliases":
+                self._send(*cluster.update_aliases(body["actions"]))
+            elif path == "_bench/reset":
+                cluster.reset()
+                self._send(200, {"acknowledged": True})
+            else:
+                self._send(404, {"error": f"unsupported path: {path}", "status": 404})
+
+        def do_DELETE(self):
+            names = urlparse(self.path).path.strip("/").split(",")
+            self._send(*cluster.delete_indices(names))
+
+    return Handler
+
+
+def serve(n_indices: int, port_queue, host: str = "127.0.0.1"):
+    """
+    SyntheticCluster를 응답하는 mock ES 서버 실행 (별도 process에서 실행)
+
+    listen 중인 port를 port_queue에 넣는다.
+    """
+    cluster = SyntheticCluster(n_indices)
+    server = ThreadingHTTPServer((host, 0), _handler(cluster))
+    port_queue.put(server.server_port)
+    server.serve_forever()
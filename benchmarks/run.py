@@ -0,0 +1,510 @@
+"""
+es_api / db_api 성능 benchmark
+
+ES는 mock 서버(synthetic cluster), MongoDB는 mongomock(또는 --mongo-url),
+MariaDB는 SQLite로 대신하여 외부 서비스 없이 같은 조건으로 반복 실행한다.
+case 마다 새 process에서 실행하여 처리량과 메모리 사용량(fixture 준비 후
+늘어난 peak RSS)을 측정하고, 저장된 baseline과 비교한다.
+
+e.g.
+    python benchmarks/run.py --save-baseline
+    python benchmarks/run.py --suite db --rows 1000000,10000000,50000000 \\
+        --mongo-url mongodb://localhost:27017
+"""
+
+import argparse
+import json
+import math
+import multiprocessing as mp
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.join(BENCH_DIR, "..")
+sys.path.insert(0, os.path.join(BASE_DIR, "src"))
+
+import datasets  # noqa: E402
+import mock_es  # noqa: E402
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_INDICES = "10000,100000"
+# 1M, 10M, 50M 은 --rows로 지정 (mongomock은 메모리에 적재하므로 --mongo-url 권장)
+DEFAULT_ROWS = "100000"
+DEFAULT_REPEAT = 3
+# 처리량이 이 비율 이상 줄거나 RSS 증가량이 이 비율 이상 늘면 regression
+DEFAULT_TOLERANCE = 0.15
+# RSS 증가량의 차이가 이보다 작으면 비율과 관계없이 regression으로 보지 않음 (MB)
+RSS_NOISE_MB = 16
+# 하나씩 요청하는 alias 전환 수
+SINGLE_SWITCH_LIMIT = 200
+BENCH_DB = "benchmark"
+
+# fixture(DataFrame, engine 등) 준비가 끝난 시점의 RSS (MB)
+_setup_rss_mb = None
+
+
+def _best_of(repeat: int, run, setup=None) -> float:
+    """
+    setup 후 run을 repeat 번 실행한 시간 중 가장 짧은 시간 (setup은 시간에 포함 안됨)
+
+    case의 fixture는 호출 전에 준비되므로 이 시점의 RSS를 메모리 측정 기준으로 사용
+    """
+    _mark_setup()
+    best = math.inf
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start_time = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+def _check(result):
+    # es_api는 실패를 (False, ...)로 반환하므로 예외로 바꿔 case 실패로 기록
+    if isinstance(result, tuple) and result[0] is False:
+        raise RuntimeError(f"failed: {result[1]}")
+    return result
+
+
+def _reset_cluster(es_url: str):
+    from app.es_api import invalidate_metadata_cache
+    from app.es_client import get_client
+
+    get_client(es_url).post("_bench/reset", json={})
+    invalidate_metadata_cache(es_url)
+
+
+# ---------- es ----------
+def es_list_case(func_name: str):
+    def case(params: dict) -> dict:
+        from app import es_api
+
+        func = getattr(es_api, func_name)
+        es_url = params["es_url"]
+        _check(es_api.check_es_url(es_url))
+        seconds = _best_of(
+            params["repeat"],
+            lambda: _check(func(es_url)),
+            # 매번 metadata cache 없이 cluster에서 다시 읽음
+            setup=lambda: es_api.invalidate_metadata_cache(es_url),
+        )
+        return {"seconds": seconds, "items": params["indices"]}
+
+    return case
+
+
+def es_switch_bulk(params: dict) -> dict:
+    from app.es_api import change_aliases_bulk
+
+    es_url = params["es_url"]
+    switches = mock_es.alias_switches(params["indices"])
+    seconds = _best_of(
+        params["repeat"],
+        lambda: _check(change_aliases_bulk(switches, es_url)),
+        setup=lambda: _reset_cluster(es_url),
+    )
+    return {"seconds": seconds, "items": len(switches)}
+
+
+def es_switch_single(params: dict) -> dict:
+    from app.es_api import change_aliases_old_to_new
+
+    es_url = params["es_url"]
+    switches = mock_es.alias_switches(params["indices"], limit=SINGLE_SWITCH_LIMIT)
+
+    def run():
+        for old_index, new_index, aliases in switches:
+            _check(change_aliases_old_to_new(old_index, new_index, aliases, es_url))
+
+    seconds = _best_of(params["repeat"], run, setup=lambda: _reset_cluster(es_url))
+    return {"seconds": seconds, "items": len(switches)}
+
+
+# ---------- db ----------
+def _store_case(func_name: str):
+    def case(params: dict) -> dict:
+        from app import db_api
+
+        func = getattr(db_api, func_name)
+        df = datasets.dataframe(params["rows"])
+        kwargs = {"schema": datasets.SCHEMA} if func_name == "store2csv" else {}
+        paths = []
+
+        def run():
+            path = func(
+                df, job_id="benchmark", compression=params["compression"], **kwargs
+            )
+            if path is None:
+                raise RuntimeError(f"failed: {func_name}")
+            paths.append(path)
+
+        def cleanup():
+            while paths:
+                os.remove(paths.pop())
+
+        seconds = _best_of(params["repeat"], run, setup=cleanup)
+        size = os.path.getsize(paths[-1])
+        cleanup()
+        return {"seconds": seconds, "items": params["rows"], "bytes": size}
+
+    return case
+
+
+def _mongo_collection(params: dict, name: str):
+    if params["mongo_url"]:
+        from pymongo import MongoClient
+
+        client = MongoClient(params["mongo_url"])
+    else:
+        import mongomock
+
+        client = mongomock.MongoClient()
+    return client[BENCH_DB][name]
+
+
+def db_rdb2mongo(params: dict) -> dict:
+    from app.db_api import DEFAULT_CHUNK_SIZE, rdb2mongo
+    from app.rdb import create_rdb_engine
+
+    engine = create_rdb_engine(f"sqlite:///{params['sqlite_path']}")
+    collection = _mongo_collection(params, "rdb2mongo")
+    chunk_size = params["chunk_size"] or DEFAULT_CHUNK_SIZE
+    query = f"SELECT * FROM {datasets.TABLE}"
+
+    def run():
+        count = rdb2mongo(engine, query, collection, datasets.SCHEMA, chunk_size)
+        if count != params["rows"]:
+            raise RuntimeError(f"imported {count} of {params['rows']} rows")
+
+    seconds = _best_of(params["repeat"], run, setup=collection.drop)
+    collection.drop()
+    engine.dispose()
+    return {"seconds": seconds, "items": params["rows"]}
+
+
+def db_csvfile2mongo(params: dict) -> dict:
+    from app.db_api import csvfile2mongo
+
+    collection = _mongo_collection(params, "csvfile2mongo")
+
+    def run():
+        count = csvfile2mongo(params["csv_path"], collection, datasets.SCHEMA)
+        if count != params["rows"]:
+            raise RuntimeError(f"imported {count} of {params['rows']} rows")
+
+    seconds = _best_of(params["repeat"], run, setup=collection.drop)
+    collection.drop()
+    return {
+        "seconds": seconds,
+        "items": params["rows"],
+        "bytes": os.path.getsize(params["csv_path"]),
+    }
+
+
+# case 이름 -> (suite, 함수)
+CASES = {
+    "es.get_all_aliases": ("es", es_list_case("get_all_aliases")),
+    "es.get_indices_wo_alias": ("es", es_list_case("get_indices_wo_alias")),
+    "es.get_cluster_snapshot": ("es", es_list_case("get_cluster_snapshot")),
+    "es.change_aliases_bulk": ("es", es_switch_bulk),
+    "es.change_aliases_old_to_new": ("es", es_switch_single),
+    "db.store2csv": ("db", _store_case("store2csv")),
+    "db.store2json": ("db", _store_case("store2json")),
+    "db.rdb2mongo": ("db", db_rdb2mongo),
+    "db.csvfile2mongo": ("db", db_csvfile2mongo),
+}
+
+
+def _proc_status_mb(field: str) -> float | None:
+    # linux /proc/self/status의 VmRSS, VmHWM (KB)
+    try:
+        with open("/proc/self/status", "r") as f:
+            match = re.search(rf"^{field}:\s+(\d+) kB", f.read(), re.MULTILINE)
+    except OSError:
+        return None
+    return int(match.group(1)) / 1024 if match else None
+
+
+def _peak_rss_mb() -> float:
+    peak = _proc_status_mb("VmHWM")
+    if peak is not None:
+        return peak
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux는 KB, macOS는 byte 단위
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def _mark_setup():
+    """
+    fixture 준비 후의 RSS를 기록
+
+    linux는 peak RSS(VmHWM)를 현재 값으로 초기화하여 이후 peak만 측정하고,
+    초기화할 수 없으면 지금까지의 peak RSS를 기준으로 사용한다.
+    """
+    global _setup_rss_mb
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        _setup_rss_mb = _proc_status_mb("VmRSS")
+    except OSError:
+        _setup_rss_mb = None
+    if _setup_rss_mb is None:
+        _setup_rss_mb = _peak_rss_mb()
+
+
+def run_case(name: str, params: dict) -> dict:
+    """
+    case 하나를 실행 (새 process에서 호출되므로 RSS는 이 case의 값)
+
+    rss_delta_mb는 fixture 준비 후부터 늘어난 peak RSS (fixture 자체는 제외)
+    """
+    import logging
+
+    logging.basicConfig(level=logging.WARNING)
+    result = CASES[name][1](params)
+    result["setup_rss_mb"] = round(_setup_rss_mb, 1)
+    result["rss_delta_mb"] = round(max(_peak_rss_mb() - _setup_rss_mb, 0), 1)
+    return result
+
+
+def _spawn_case(name: str, params: dict) -> dict:
+    context = mp.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_case, name, params).result()
+
+
+def _case_key(name: str, size_name: str, size: int) -> str:
+    return f"{name}[{size_name}={size}]"
+
+
+def _summarize(name: str, size_name: str, size: int, result: dict) -> dict:
+    seconds = result["seconds"]
+    summary = {
+        "case": name,
+        size_name: size,
+        "seconds": round(seconds, 4),
+        "items": result["items"],
+        "items_per_sec": round(result["items"] / seconds, 1) if seconds > 0 else None,
+        "setup_rss_mb": result["setup_rss_mb"],
+        "rss_delta_mb": result["rss_delta_mb"],
+    }
+    if "bytes" in result:
+        summary["mb_per_sec"] = (
+            round(result["bytes"] / 1024**2 / seconds, 2) if seconds > 0 else None
+        )
+    return summary
+
+
+def run_cases(names: list[str], size_name: str, size: int, params: dict) -> dict:
+    results = {}
+    for name in names:
+        key = _case_key(name, size_name, size)
+        print(f"run: {key}", flush=True)
+        try:
+            result = _spawn_case(name, {**params, size_name: size})
+            results[key] = _summarize(name, size_name, size, result)
+        except Exception as e:
+            results[key] = {"case": name, size_name: size, "error": str(e)}
+    return results
+
+
+def run_es_suite(names: list[str], sizes: list[int], params: dict) -> dict:
+    results = {}
+    context = mp.get_context("spawn")
+    for size in sizes:
+        # mock 서버는 별도 process로 띄워 benchmark process의 RSS에 포함되지 않게 함
+        port_queue = context.Queue()
+        server = context.Process(
+            target=mock_es.serve, args=(size, port_queue), daemon=True
+        )
+        server.start()
+        try:
+            es_url = f"http://127.0.0.1:{port_queue.get(timeout=600)}"
+            results.update(
+                run_cases(names, "indices", size, {**params, "es_url": es_url})
+            )
+        finally:
+            server.terminate()
+            server.join()
+    return results
+
+
+def run_db_suite(names: list[str], sizes: list[int], params: dict) -> dict:
+    results = {}
+    for size in sizes:
+        # 데이터 생성 시간과 메모리는 측정에서 제외 (한번 만든 파일은 재사용)
+        print(f"prepare: {size} rows", flush=True)
+        params = {
+            **params,
+            "sqlite_path": datasets.sqlite_dataset(size),
+            "csv_path": datasets.csv_dataset(size),
+        }
+        results.update(run_cases(names, "rows", size, params))
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[dict]:
+    """
+    baseline과 case 별 처리량, RSS 증가량 비교
+
+    Returns:
+        list[dict]: case 별 {case, items_per_sec, baseline_items_per_sec,
+            throughput_change, rss_delta_mb, baseline_rss_delta_mb, rss_change,
+            regression}
+    """
+    rows = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        row = {"case": key, "error": result.get("error"), "regression": False}
+        for field in ("items_per_sec", "rss_delta_mb"):
+            row[field] = result.get(field)
+            row[f"baseline_{field}"] = None if base is None else base.get(field)
+        if base is not None and row["error"] is None:
+            row["throughput_change"] = _change(
+                row["items_per_sec"], row["baseline_items_per_sec"]
+            )
+            row["rss_change"] = _change(
+                row["rss_delta_mb"], row["baseline_rss_delta_mb"]
+            )
+            row["regression"] = (
+                row["throughput_change"] is not None
+                and row["throughput_change"] < -tolerance
+            ) or (
+                row["rss_change"] is not None
+                and row["rss_change"] > tolerance
+                and row["rss_delta_mb"] - row["baseline_rss_delta_mb"] > RSS_NOISE_MB
+            )
+        rows.append(row)
+    return rows
+
+
+def _change(value: float | None, base: float | None) -> float | None:
+    if value is None or not base:
+        return None
+    return value / base - 1
+
+
+def _percent(change: float | None) -> str:
+    return "" if change is None else f"{change:+.1%}"
+
+
+def print_report(rows: list[dict]):
+    header = (
+        f"{'case':<52} {'items/s':>12} {'vs base':>8} {'rss +MB':>8} {'vs base':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        if row["error"] is not None:
+            print(f"{row['case']:<52} ERROR {row['error']}")
+            continue
+        mark = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['case']:<52} {row['items_per_sec'] or 0:>12,.0f}"
+            f" {_percent(row.get('throughput_change')):>8}"
+            f" {row['rss_delta_mb']:>8,.1f} {_percent(row.get('rss_change')):>8}{mark}"
+        )
+
+
+def _sizes(value: str) -> list[int]:
+    return [int(size) for size in value.split(",") if size.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="simple_tools benchmark")
+    parser.add_argument("--suite", choices=["all", "es", "db"], default="all")
+    parser.add_argument(
+        "--cases", nargs="*", default=[], help="이름에 포함된 case만 실행"
+    )
+    parser.add_argument("--indices", default=DEFAULT_INDICES, help="e.g. 10000,100000")
+    parser.add_argument(
+        "--rows", default=DEFAULT_ROWS, help="e.g. 1000000,10000000,50000000"
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--compression", choices=["gzip", "zstd"], default=None)
+    parser.add_argument(
+        "--mongo-url", default=None, help="지정하지 않으면 mongomock 사용"
+    )
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="결과를 baseline으로 저장"
+    )
+    parser.add_argument("--output", default=None, help="결과 json 저장 경로")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    names = [
+        name
+        for name, (suite, _) in CASES.items()
+        if args.suite in ("all", suite)
+        and (not args.cases or any(case in name for case in args.cases))
+    ]
+    params = {
+        "repeat": args.repeat,
+        "chunk_size": args.chunk_size,
+        "compression": args.compression,
+        "mongo_url": args.mongo_url,
+    }
+
+    results = {}
+    es_names = [name for name in names if CASES[name][0] == "es"]
+    db_names = [name for name in names if CASES[name][0] == "db"]
+    if es_names:
+        results.update(run_es_suite(es_names, _sizes(args.indices), params))
+    if db_names:
+        results.update(run_db_suite(db_names, _sizes(args.rows), params))
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(sep=" ", timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "mongo": "mongodb" if args.mongo_url else "mongomock",
+            "repeat": args.repeat,
+            "compression": args.compression,
+        },
+        "results": results,
+    }
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+    rows = compare(results, baseline, args.tolerance)
+    print_report(rows)
+
+    for path in filter(None, [args.output, args.save_baseline and args.baseline]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"saved: {path}")
+
+    if any(row["regression"] or row["error"] for row in rows):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
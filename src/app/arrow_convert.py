@@ -0,0 +1,166 @@
+import logging
+from decimal import Decimal
+from typing import Iterator
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from bson.decimal128 import Decimal128
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DECIMAL = "decimal"
+# MariaDB DATETIME(6) 처럼 microsecond 값이 있어도 cast에서 실패하지 않도록 us 단위 사용
+# (mongodb에 저장될 때 ms로 잘림)
+DATE_TYPE = pa.timestamp("us")
+
+# mongo_schema.json의 schema 타입(mongoimport --columnsHaveTypes 타입명) -> arrow 타입
+# decimal은 고정 precision/scale로 cast하지 않고 값에서 정함 (decimal_column 참고)
+ARROW_TYPES = {
+    "string": pa.string(),
+    "int32": pa.int32(),
+    "int64": pa.int64(),
+    "double": pa.float64(),
+    "boolean": pa.bool_(),
+    "date": DATE_TYPE,
+    "date_go": DATE_TYPE,
+    "date_ms": DATE_TYPE,
+    "date_oracle": DATE_TYPE,
+}
+
+
+def arrow_type(_type: str) -> pa.DataType | None:
+    """
+    schema 타입에 해당하는 arrow 타입 (auto, binary 등은 None: 추론된 타입 사용)
+    """
+    return ARROW_TYPES.get(_type)
+
+
+def decimal_column(array: pa.Array) -> pa.Array:
+    """
+    decimal 컬럼: 이미 decimal이면 원본 precision/scale을 유지하고,
+    그 외(문자열, 실수 등)는 값으로부터 precision/scale을 정해 변환
+    """
+    if pa.types.is_decimal(array.type):
+        return array
+    values = [
+        None if value is None or value == "" else Decimal(str(value))
+        for value in array.to_pylist()
+    ]
+    # 38 자리를 넘으면 decimal256으로 추론됨
+    return pa.array(values) if any(v is not None for v in values) else array
+
+
+def cast_column(array: pa.Array, _type: str) -> pa.Array:
+    if _type == DECIMAL:
+        return decimal_column(array)
+    target = arrow_type(_type)
+    if target is None or array.type == target:
+        return array
+    return array.cast(target)
+
+
+def to_record_batch(
+    columns: list[str], rows: list[tuple], schema: dict = None
+) -> pa.RecordBatch:
+    """
+    row(tuple) 목록을 컬럼 단위로 arrow 배열로 바꾸고 schema 타입으로 cast
+
+    schema가 있으면 schema에 있는 컬럼만 schema 순서대로 남긴다.
+    """
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    arrays = dict(zip(columns, values))
+
+    if schema is None:
+        names = columns
+        return pa.RecordBatch.from_arrays(
+            [pa.array(arrays[name]) for name in names], names=names
+        )
+
+    names = list(schema.keys())
+    return pa.RecordBatch.from_arrays(
+        [
+            cast_column(pa.array(arrays.get(name, [None] * len(rows))), schema[name])
+            for name in names
+        ],
+        names=names,
+    )
+
+
+def iter_arrow_batches(
+    engine: Engine,
+    query: str,
+    chunk_size: int,
+    schema: dict = None,
+    params: dict = None,
+) -> Iterator[pa.RecordBatch]:
+    """
+    server-side cursor로 query 결과를 chunk_size row 씩 arrow RecordBatch로 반환
+    """
+    with engine.connect() as conn:
+        result = conn.execution_options(
+            stream_results=True, max_row_buffer=chunk_size
+        ).execute(text(query), params or {})
+        columns = list(result.keys())
+        for partition in result.partitions(chunk_size):
+            yield to_record_batch(columns, partition, schema)
+
+
+def iter_csv_batches(source, schema: dict, block_size: int) -> Iterator[pa.RecordBatch]:
+    """
+    header 없는 csv(mongoimport --fields 형식)를 block_size byte 씩 읽어
+    schema 타입으로 파싱된 RecordBatch로 반환
+
+    Args:
+        source: csv 파일 경로 또는 file object (uploaded file 포함)
+        schema (dict): {컬럼명: 타입}, 컬럼 순서는 csv 컬럼 순서와 같아야 함
+        block_size (int): 한번에 읽어 파싱할 byte 수
+    """
+    column_types = {
+        col: arrow_type(_type)
+        for col, _type in schema.items()
+        if arrow_type(_type) is not None
+    }
+    # decimal은 문자열로 읽은 뒤 값에 맞는 precision/scale로 변환
+    decimal_columns = [col for col, _type in schema.items() if _type == DECIMAL]
+    column_types.update({col: pa.string() for col in decimal_columns})
+    reader = pa_csv.open_csv(
+        source,
+        read_options=pa_csv.ReadOptions(
+            column_names=list(schema.keys()), block_size=block_size
+        ),
+        convert_options=pa_csv.ConvertOptions(column_types=column_types),
+    )
+    for batch in reader:
+        if decimal_columns:
+            batch = pa.RecordBatch.from_arrays(
+                [
+                    decimal_column(column) if name in decimal_columns else column
+                    for name, column in zip(batch.schema.names, batch.columns)
+                ],
+                names=batch.schema.names,
+            )
+        yield batch
+
+
+def _column_to_pylist(array: pa.Array) -> list:
+    # BSON은 date를 저장할 수 없으므로 date32/date64(자정)는 datetime으로 변환
+    if pa.types.is_date(array.type):
+        array = array.cast(DATE_TYPE)
+    values = array.to_pylist()
+    if pa.types.is_decimal(array.type):
+        return [None if value is None else Decimal128(value) for value in values]
+    return values
+
+
+def record_batch_to_documents(batch: pa.RecordBatch) -> list[dict]:
+    """
+    RecordBatch를 BSON으로 바로 넣을 수 있는 document 목록으로 변환
+
+    변환은 컬럼 단위로 처리하고, decimal은 Decimal128로 바꾼다.
+    (timestamp, date -> datetime, int/float/bool/string은 그대로)
+    """
+    names = batch.schema.names
+    columns = [_column_to_pylist(column) for column in batch.columns]
+    return [dict(zip(names, values)) for values in zip(*columns)]
@@ -0,0 +1,156 @@
+import json
+import logging
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+logger = logging.getLogger(__name__)
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.join(FILE_DIR, "../../")
+
+# temp/ 옆에 collection 별 checkpoint 파일 저장
+CHECKPOINT_DIR = os.path.join(BASE_DIR, "checkpoints")
+
+
+def to_json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, (date, Decimal)):
+        return str(value)
+    return value
+
+
+class Checkpoint:
+    """
+    collection 하나의 import 진행 상태 (마지막으로 적재 완료된 chunk)
+
+    chunk가 적재될 때마다 파일로 저장되며, 실패한 import는 이 상태부터 다시 시작한다.
+    query를 key 순서로 정렬해서 읽고, 마지막 key 값(watermark) 이후부터 다시 읽는다.
+    ORDER BY 없는 query의 row offset은 실행마다 순서가 달라질 수 있으므로
+    key(정렬 가능한 unique 컬럼) 없이는 checkpoint를 만들 수 없다.
+
+    Args:
+        db (str): mongodb database 이름
+        collection (str): mongodb collection 이름
+        key (str): watermark로 사용할 unique 컬럼
+        checkpoint_dir (str): checkpoint 파일 경로
+    """
+
+    def __init__(
+        self,
+        db: str,
+        collection: str,
+        key: str,
+        checkpoint_dir: str = CHECKPOINT_DIR,
+    ):
+        if not key:
+            raise ValueError(f"checkpoint key is required: {db}.{collection}")
+        self.db = db
+        self.collection = collection
+        self.key = key
+        self.path = os.path.join(checkpoint_dir, f"{db}.{collection}.json")
+
+        self.rows = 0
+        self.chunks = 0
+        self.watermark = None
+        self.updated_at = None
+
+    def __repr__(self):
+        return (
+            f"Checkpoint({self.db}.{self.collection}, rows={self.rows}, "
+            f"watermark={self.watermark!r})"
+        )
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self) -> "Checkpoint":
+        if not self.exists():
+            return self
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        # key가 바뀐 경우 이전 watermark는 사용할 수 없음
+        if data.get("key") != self.key:
+            logger.warning(f"checkpoint key changed, ignore: {self.path}")
+            return self
+        self.rows = data["rows"]
+        self.chunks = data["chunks"]
+        self.watermark = data["watermark"]
+        self.updated_at = data["updated_at"]
+        return self
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.updated_at = datetime.now().isoformat(sep=" ", timespec="seconds")
+        data = {
+            "db": self.db,
+            "collection": self.collection,
+            "key": self.key,
+            "rows": self.rows,
+            "chunks": self.chunks,
+            "watermark": self.watermark,
+            "updated_at": self.updated_at,
+        }
+        # 저장 도중 실패해도 이전 checkpoint가 깨지지 않도록 임시 파일에 쓰고 교체
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def commit(self, rows: int, watermark=None):
+        """
+        chunk 하나가 적재된 후 호출하여 진행 상태를 저장
+        """
+        self.rows += rows
+        self.chunks += 1
+        if watermark is not None:
+            self.watermark = to_json_value(watermark)
+        self.save()
+
+    def clear(self):
+        if self.exists():
+            os.remove(self.path)
+        self.rows, self.chunks, self.watermark, self.updated_at = 0, 0, None, None
+
+    def resume_query(self, query: str) -> tuple[str, dict]:
+        """
+        watermark 이후 row만 key 순서로 읽는 query로 감싸서 반환
+        """
+        return watermark_query(query, self.key, self.watermark)
+
+
+def watermark_query(
+    query: str, key: str, watermark=None, inclusive: bool = False
+) -> tuple[str, dict]:
+    """
+    query를 key 순서로 정렬하고 watermark 이후 row만 읽도록 감싼 query와 parameter
+
+    Args:
+        query (str): 원본 query
+        key (str): 정렬/비교 기준 컬럼
+        watermark: 마지막으로 읽은 key 값 (None이면 처음부터)
+        inclusive (bool): watermark와 같은 값도 다시 읽을지 여부
+
+    Returns:
+        tuple[str, dict]: (query, parameter)
+    """
+    if watermark is None:
+        return f"SELECT * FROM ({query}) AS t ORDER BY {key}", {}
+    op = ">=" if inclusive else ">"
+    return (
+        f"SELECT * FROM ({query}) AS t WHERE {key} {op} :watermark ORDER BY {key}",
+        {"watermark": watermark},
+    )
+
+
+def list_checkpoints(checkpoint_dir: str = CHECKPOINT_DIR) -> list[dict]:
+    if not os.path.exists(checkpoint_dir):
+        return []
+    checkpoints = []
+    for file_name in sorted(os.listdir(checkpoint_dir)):
+        if not file_name.endswith(".json"):
+            continue
+        with open(os.path.join(checkpoint_dir, file_name), "r", encoding="utf-8") as f:
+            checkpoints.append(json.load(f))
+    return checkpoints
@@ -2,7 +2,27 @@ import pandas as pd
 import json
 import os
 import logging
+import shutil
 import subprocess
+import time
+from datetime import timedelta
+from typing import Callable
+
+from pymongo import ASCENDING, IndexModel, ReplaceOne
+from pymongo.collection import Collection
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError, OperationFailure
+from sqlalchemy.engine import Engine
+
+from .arrow_convert import (
+    iter_arrow_batches,
+    iter_csv_batches,
+    record_batch_to_documents,
+)
+from .checkpoint import Checkpoint, to_json_value, watermark_query
+from .metrics import instrument, observe_rows, observe_throughput
+from .spans import StageSpans
+from .temp_manager import get_temp_manager, open_artifact
 
 logger = logging.getLogger(__name__)
 
@@ -12,16 +32,24 @@ BASE_DIR = os.path.join(FILE_DIR, "../../")
 LOG_DIR = os.path.join(BASE_DIR, "logs")
 TEMP_DIR = os.path.join(BASE_DIR, "temp")
 
+# RDB에서 한번에 가져와 mongodb에 넣을 row 수
+DEFAULT_CHUNK_SIZE = 10000
+# csv 파일을 한번에 읽어 파싱할 byte 수 (업로드 파일 저장 시에도 사용)
+DEFAULT_CSV_BLOCK_SIZE = 16 * 1024 * 1024
+# blue/green 적재 시 staging collection 이름 suffix
+STAGING_SUFFIX = "__staging"
 
-def store2json(df: pd.DataFrame):
+
+@instrument("db_api")
+def store2json(df: pd.DataFrame, job_id: str = None, compression: str = None):
     logger.info("convert to dict")
     df_dict = df.to_dict(orient="records")
     logger.info(type(df_dict))
     logger.info("complete convert to dict")
-    temp_path = os.path.join(TEMP_DIR, "temp.json")
+    temp_path = get_temp_manager().new_path("temp.json", job_id, compression)
 
     try:
-        with open(temp_path, "w") as f:
+        with open_artifact(temp_path, "wt") as f:
             json.dump(df_dict, f)
         logger.info("Complete: DataFrame to bson file ")
         return temp_path
@@ -31,6 +59,7 @@ def store2json(df: pd.DataFrame):
         return None
 
 
+@instrument("db_api")
 def json2mongo(path, db, user, pw, host, port, collection):
     mongoimport_command = [
         "mongoimport",
@@ -48,6 +77,8 @@ def json2mongo(path, db, user, pw, host, port, collection):
         "--numInsertionWorkers",
         "4",
     ]
+    if path.endswith(".gz"):
+        mongoimport_command.append("--gzip")
     logger.info(mongoimport_command)
     logger.info(f"mongoimport start")
     result = subprocess.run(mongoimport_command, capture_output=True, text=True)
@@ -62,14 +93,18 @@ def json2mongo(path, db, user, pw, host, port, collection):
         return 1
 
 
-def store2csv(df: pd.DataFrame, schema: dict = None):
-    temp_path = os.path.join(TEMP_DIR, "temp.csv")
+@instrument("db_api")
+def store2csv(
+    df: pd.DataFrame, schema: dict = None, job_id: str = None, compression: str = None
+):
+    temp_path = get_temp_manager().new_path("temp.csv", job_id, compression)
     if schema is None:
         cols = df.columns
     else:
         cols = schema.keys()
     try:
-        df.to_csv(temp_path, columns=cols, index=False, header=False)
+        with open_artifact(temp_path, "wb") as f:
+            df.to_csv(f, columns=cols, index=False, header=False)
         logger.info("Complete: DataFrame to temp file ")
         return temp_path
     except Exception as e:
@@ -78,6 +113,7 @@ def store2csv(df: pd.DataFrame, schema: dict = None):
         return None
 
 
+@instrument("db_api")
 def csv2mongo(path, schema, db, user, pw, host, port, collection):
     mongoimport_command = [
         "mongoimport",
@@ -99,6 +135,8 @@ def csv2mongo(path, schema, db, user, pw, host, port, collection):
         "--numInsertionWorkers",
         "4",
     ]
+    if path.endswith(".gz"):
+        mongoimport_command.append("--gzip")
     logger.info(f"mongoimport start")
     result = subprocess.run(mongoimport_command, capture_output=True, text=True)
     logger.info(f"subprocess stdout: {result.stdout}")
@@ -110,3 +148,335 @@ def csv2mongo(path, schema, db, user, pw, host, port, collection):
     else:
         logger.error("Error occurred during import")
         return 1
+
+
+@instrument("db_api")
+def insert_documents(collection: Collection, docs: list[dict]) -> int:
+    """
+    insert_many(ordered=False)로 document를 넣고, 들어간 document 수를 반환
+
+    중복 키 등 일부 document 실패는 mongoimport처럼 로그만 남기고 계속 진행한다.
+    """
+    if len(docs) == 0:
+        return 0
+    try:
+        inserted = len(collection.insert_many(docs, ordered=False).inserted_ids)
+    except BulkWriteError as e:
+        logger.warning(f"Fail: insert {len(e.details['writeErrors'])} documents")
+        logger.error(e.details["writeErrors"][:5])
+        inserted = e.details["nInserted"]
+    observe_rows(collection.name, "insert", inserted)
+    return inserted
+
+
+def _import_batch(spans: StageSpans, batch, write_fn: Callable, collection, *args):
+    """
+    RecordBatch를 document로 변환(serialize)하고 write_fn으로 적재(import),
+    stage 별 시간을 spans에 기록하고 적재된 document 수를 반환
+    """
+    with spans.stage("serialize", batch.num_rows, batch.nbytes):
+        docs = record_batch_to_documents(batch)
+    start_time = time.perf_counter()
+    count = write_fn(collection, docs, *args)
+    spans.add("import", time.perf_counter() - start_time, count, batch.nbytes)
+    return count
+
+
+@instrument("db_api")
+def rdb2mongo(
+    engine: Engine,
+    query: str,
+    collection: Collection,
+    schema: dict = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress_callback: Callable[[int], None] = None,
+    checkpoint: Checkpoint = None,
+) -> int:
+    """
+    RDB query 결과를 임시 파일 없이 chunk 단위로 mongodb collection에 적재
+
+    한번에 chunk_size row만 메모리에 올리므로 table 크기와 상관없이
+    메모리 사용량이 일정하다. chunk는 arrow RecordBatch로 받아
+    schema 타입으로 컬럼 단위 변환한 뒤 document로 만든다.
+
+    checkpoint가 주어지면 query를 checkpoint.key 순서로 읽으며 chunk 마다
+    진행 상태를 저장하고, 저장된 상태 이후부터 적재를 이어간다.
+    이전 실행이 남긴 checkpoint가 있으면 일부만 적재된 chunk를 다시 읽게 되므로
+    key 기준 upsert로 적재한다. (중복 적재되지 않음) 모두 적재되면 checkpoint를 지운다.
+
+    Args:
+        engine (Engine): RDB SQLAlchemy engine
+        query (str): 실행할 query
+        collection (Collection): 적재할 mongodb collection
+        schema (dict): {컬럼명: 타입} (mongo_schema.json의 schema)
+        chunk_size (int): chunk 하나의 row 수
+        progress_callback (Callable[[int], None]): chunk 적재 후 누적 row 수로 호출
+        checkpoint (Checkpoint): 재시작용 checkpoint (key 컬럼은 schema에 있어야 함)
+
+    Returns:
+        int: 적재된 document 수 (checkpoint 이전에 적재된 수 포함)
+    """
+    logger.info(f"rdb2mongo start: {collection.full_name}")
+    start_time = time.perf_counter()
+    params, total = {}, 0
+    write_fn, write_args = insert_documents, ()
+    if checkpoint is not None:
+        # 첫 chunk를 적재한 뒤에 key가 없다는 것을 알게 되지 않도록 미리 확인
+        if schema is not None and checkpoint.key not in schema:
+            raise ValueError(f"checkpoint key not in schema: {checkpoint.key}")
+        query, params = checkpoint.resume_query(query)
+        if checkpoint.exists():
+            # 이전 실행이 중단된 chunk는 일부가 이미 적재되어 있을 수 있음
+            collection.create_index(checkpoint.key)
+            write_fn, write_args = upsert_documents, ([checkpoint.key],)
+            logger.info(f"rdb2mongo resume: {checkpoint}")
+        else:
+            # 첫 chunk 도중 중단되어도 재시작 시 upsert 하도록 시작 상태를 저장
+            checkpoint.save()
+        total = checkpoint.rows
+    # checkpoint 이전에 적재된 row는 처리량 계산에서 제외
+    resumed_rows = total
+
+    with StageSpans(collection=collection.name, operation="rdb2mongo") as spans:
+        batches = iter_arrow_batches(engine, query, chunk_size, schema, params=params)
+        for batch in spans.iter("fetch", batches):
+            count = _import_batch(spans, batch, write_fn, collection, *write_args)
+            # upsert는 변경 없이 다시 적재된 document를 세지 않으므로 읽은 row 수 사용
+            total += batch.num_rows if write_args else count
+            if checkpoint is not None and batch.num_rows > 0:
+                watermark = batch.column(checkpoint.key)[-1].as_py()
+                checkpoint.commit(batch.num_rows, watermark)
+            if progress_callback is not None:
+                progress_callback(total)
+
+    if checkpoint is not None:
+        checkpoint.clear()
+    observe_throughput(
+        collection.name,
+        "rdb2mongo",
+        total - resumed_rows,
+        time.perf_counter() - start_time,
+    )
+    logger.info(f"rdb2mongo finish: {collection.full_name} ({total} documents)")
+    return total
+
+
+@instrument("db_api")
+def upsert_documents(
+    collection: Collection, docs: list[dict], primary_key: list[str]
+) -> int:
+    """
+    primary_key 컬럼 기준으로 document를 bulk ReplaceOne(upsert=True) 하고,
+    추가/변경된 document 수를 반환
+    """
+    if len(docs) == 0:
+        return 0
+    operations = [
+        ReplaceOne({key: doc[key] for key in primary_key}, doc, upsert=True)
+        for doc in docs
+    ]
+    try:
+        result = collection.bulk_write(operations, ordered=False)
+        upserted = result.upserted_count + result.modified_count
+    except BulkWriteError as e:
+        logger.warning(f"Fail: upsert {len(e.details['writeErrors'])} documents")
+        logger.error(e.details["writeErrors"][:5])
+        upserted = e.details["nUpserted"] + e.details["nModified"]
+    observe_rows(collection.name, "upsert", upserted)
+    return upserted
+
+
+@instrument("db_api")
+def rdb2mongo_delta(
+    engine: Engine,
+    query: str,
+    collection: Collection,
+    delta_key: str,
+    primary_key: str | list[str],
+    watermark=None,
+    schema: dict = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress_callback: Callable[[int], None] = None,
+) -> tuple[int, object]:
+    """
+    delta_key(updated_at 또는 증가하는 key) 값이 watermark 이후인 row만 가져와
+    primary_key 기준으로 upsert
+
+    같은 시각에 변경된 row를 놓치지 않도록 watermark와 같은 값도 다시 읽는다.
+    (upsert이므로 중복 적재되지 않음)
+
+    Args:
+        engine (Engine): RDB SQLAlchemy engine
+        query (str): 실행할 query
+        collection (Collection): 적재할 mongodb collection
+        delta_key (str): 변경 여부 판단 컬럼 (schema에 포함되어 있어야 함)
+        primary_key (str | list[str]): upsert 기준 컬럼 (문자열이면 "," 로 구분)
+        watermark: 이전 sync의 마지막 delta_key 값 (None이면 전체)
+        schema (dict): {컬럼명: 타입} (mongo_schema.json의 schema)
+        chunk_size (int): chunk 하나의 row 수
+        progress_callback (Callable[[int], None]): chunk 적재 후 누적 row 수로 호출
+
+    Returns:
+        tuple[int, object]: (추가/변경된 document 수, 새 watermark)
+    """
+    if isinstance(primary_key, str):
+        primary_key = [key.strip() for key in primary_key.split(",")]
+
+    logger.info(f"rdb2mongo_delta start: {collection.full_name} ({watermark})")
+    # upsert 조회용 index
+    collection.create_index([(key, ASCENDING) for key in primary_key])
+
+    query, params = watermark_query(query, delta_key, watermark, inclusive=True)
+    start_time = time.perf_counter()
+    total = 0
+    with StageSpans(collection=collection.name, operation="rdb2mongo_delta") as spans:
+        batches = iter_arrow_batches(engine, query, chunk_size, schema, params=params)
+        for batch in spans.iter("fetch", batches):
+            total += _import_batch(
+                spans, batch, upsert_documents, collection, primary_key
+            )
+            if batch.num_rows > 0:
+                watermark = to_json_value(batch.column(delta_key)[-1].as_py())
+            if progress_callback is not None:
+                progress_callback(total)
+
+    observe_throughput(
+        collection.name, "rdb2mongo_delta", total, time.perf_counter() - start_time
+    )
+    logger.info(
+        f"rdb2mongo_delta finish: {collection.full_name} ({total} documents, {watermark})"
+    )
+    return total, watermark
+
+
+def get_staging_collection(db: Database, name: str, drop: bool = True) -> Collection:
+    """
+    name collection 대신 적재할 staging collection을 반환
+
+    drop=True면 이전에 남아있던 staging collection을 지우고 새로 시작한다.
+    """
+    staging = db.get_collection(f"{name}{STAGING_SUFFIX}")
+    if drop:
+        staging.drop()
+    return staging
+
+
+@instrument("db_api")
+def swap_collection(staging: Collection, name: str):
+    """
+    적재/index 생성이 끝난 staging collection을 name collection으로 교체
+
+    renameCollection(dropTarget=True)로 한번에 바꾸므로 읽는 쪽에서는
+    이전 collection 또는 새 collection만 보인다.
+    """
+    logger.info(f"swap collection: {staging.full_name} -> {name}")
+    staging.rename(name, dropTarget=True)
+
+
+def _index_model(index) -> IndexModel:
+    # mongo_schema.json의 index: "field", [["field", 1], ...] 또는 {"keys": ..., 옵션}
+    if isinstance(index, dict):
+        options = dict(index)
+        return IndexModel(options.pop("keys"), **options)
+    return IndexModel(index)
+
+
+def get_index_sizes(collection: Collection) -> dict:
+    try:
+        return collection.database.command("collStats", collection.name)["indexSizes"]
+    except (OperationFailure, KeyError) as e:
+        logger.warning(f"Fail: collStats {collection.full_name}")
+        logger.error(e)
+        return {}
+
+
+@instrument("db_api")
+def create_indexes(collection: Collection, indexes: list) -> list[dict]:
+    """
+    collection의 index들을 createIndexes 명령 한번으로 생성
+
+    서버가 collection을 한번만 scan 하여 모든 index를 함께 만든다.
+    index 별 결과에는 생성 시간(명령 전체 시간)과 index 크기가 포함된다.
+
+    Args:
+        collection (Collection): 대상 collection
+        indexes (list): mongo_schema.json의 index 목록
+
+    Returns:
+        list[dict]: {"collection", "index", "build_time", "size"} 목록
+    """
+    if not indexes:
+        return []
+
+    logger.info(f"create indexes start: {collection.full_name} ({len(indexes)})")
+    start_time = time.time()
+    names = collection.create_indexes([_index_model(index) for index in indexes])
+    build_time = timedelta(seconds=time.time() - start_time)
+    logger.info(f"create indexes finish: {collection.full_name} ({build_time})")
+
+    sizes = get_index_sizes(collection)
+    return [
+        {
+            "collection": collection.name,
+            "index": name,
+            "build_time": str(build_time),
+            "size": sizes.get(name),
+        }
+        for name in names
+    ]
+
+
+@instrument("db_api")
+def store_upload(file, path: str, block_size: int = DEFAULT_CSV_BLOCK_SIZE) -> str:
+    """
+    업로드된 파일(file object)을 block_size 씩 나누어 path에 저장
+
+    getvalue()로 전체 내용을 bytes 하나로 복사하지 않는다.
+    path가 .gz, .zst로 끝나면 저장하면서 압축한다.
+    """
+    file.seek(0)
+    with open_artifact(path, "wb") as f:
+        shutil.copyfileobj(file, f, block_size)
+    logger.info(f"Complete: store upload file {path}")
+    return path
+
+
+@instrument("db_api")
+def csvfile2mongo(
+    source,
+    collection: Collection,
+    schema: dict,
+    block_size: int = DEFAULT_CSV_BLOCK_SIZE,
+    progress_callback: Callable[[int], None] = None,
+) -> int:
+    """
+    header 없는 csv를 block_size 씩 읽고 schema 타입으로 파싱하여
+    mongoimport 없이 바로 collection에 적재
+
+    한번에 block 하나만 메모리에 올리므로 파일 크기와 상관없이
+    메모리 사용량이 일정하다.
+
+    Args:
+        source: csv 파일 경로(.gz, .zst 압축 포함) 또는 file object
+        collection (Collection): 적재할 mongodb collection
+        schema (dict): {컬럼명: 타입} (mongo_schema.json의 schema)
+        block_size (int): 한번에 읽어 파싱할 byte 수
+        progress_callback (Callable[[int], None]): batch 적재 후 누적 row 수로 호출
+
+    Returns:
+        int: 적재된 document 수
+    """
+    logger.info(f"csvfile2mongo start: {collection.full_name}")
+    start_time = time.perf_counter()
+    total = 0
+    with StageSpans(collection=collection.name, operation="csvfile2mongo") as spans:
+        batches = iter_csv_batches(source, schema, block_size)
+        for batch in spans.iter("fetch", batches):
+            total += _import_batch(spans, batch, insert_documents, collection)
+            if progress_callback is not None:
+                progress_callback(total)
+    observe_throughput(
+        collection.name, "csvfile2mongo", total, time.perf_counter() - start_time
+    )
+    logger.info(f"csvfile2mongo finish: {collection.full_name} ({total} documents)")
+    return total
@@ -1,35 +1,88 @@
 import requests
-from requests.exceptions import ConnectTimeout, Timeout
-import asyncio
-from .auto_indexing.src import indexing_service
-from pandas import DataFrame
-
-
-def check_es_url(url: str):
+from requests.exceptions import RequestException
+from concurrent.futures import as_completed
+from .es_client import ESClient, get_client
+from .es_snapshot import INVENTORY_COLUMNS, ClusterSnapshot, IndexStats
+from .index_family import NamingRule
+from .metrics import instrument
+
+# _aliases 요청 하나에 담을 최대 action 수
+DEFAULT_ALIAS_CHUNK_SIZE = 1000
+# index 삭제 시 동시 요청 수, 요청 하나의 index 목록 최대 길이(http.max_initial_line_length 4kb 이내)
+DEFAULT_DELETE_WORKERS = 4
+DEFAULT_DELETE_URL_LENGTH = 3500
+# index 통계 포함 _cat/indices (store.size는 byte 단위)
+INVENTORY_END_POINT = (
+    f"_cat/indices?format=json&bytes=b&h={INVENTORY_COLUMNS}&s=index:desc"
+)
+
+
+@instrument("es_api")
+def check_es_url(url: str | ESClient):
     if url == "":
         return False
 
+    # 잘못 입력된 url에서 재시도/backoff로 오래 기다리지 않도록 retry 없이 한번만 요청
+    es_url = url.es_url if isinstance(url, ESClient) else url
     try:
-        resp = requests.get(url, timeout=5)
-    except ConnectTimeout as e:
+        resp = requests.get(es_url, timeout=5)
+        version = resp.json()["version"]["number"] if resp.status_code == 200 else ""
+    except (RequestException, ValueError, KeyError, TypeError) as e:
         return False
 
-    if resp.status_code == 200 and resp.json()["version"]["number"].startswith("7"):
+    if version.startswith("7"):
+        # 확인된 url만 client registry에 등록 (입력한 url마다 pool이 남지 않도록)
+        get_client(url)
         return True
     else:
         return False
 
 
+def _get_json(
+    es_url: str | ESClient, end_point: str, cached: bool = True
+) -> tuple[bool, object] | tuple[bool, requests.Response]:
+    """
+    GET 요청의 json 응답을 반환. cached=True인 경우 client의 metadata cache를 사용
+
+    실패한 응답은 캐시하지 않고 Response를 그대로 반환한다.
+    """
+    client = get_client(es_url)
+
+    if cached:
+        hit, data = client.metadata_cache.get(end_point)
+        if hit:
+            return True, data
+
+    resp = client.get(end_point)
+
+    if resp.status_code != 200:
+        return False, resp
+
+    data = resp.json()
+    if cached:
+        client.metadata_cache.set(end_point, data)
+    return True, data
+
+
+def invalidate_metadata_cache(es_url: str | ESClient):
+    get_client(es_url).metadata_cache.invalidate()
+
+
+def get_metadata_cache_stats(es_url: str | ESClient) -> dict:
+    return get_client(es_url).metadata_cache.stats()
+
+
+@instrument("es_api")
 def get_indices_wo_alias(
-    es_url: str,
+    es_url: str | ESClient,
 ) -> tuple[bool, list] | tuple[bool, requests.Response]:
-    end_point = f"{es_url}/_alias"
+    end_point = "_alias"
 
-    resp = requests.get(end_point)
+    status, resp = _get_json(es_url, end_point)
 
-    if resp.status_code == 200:
+    if status:
         index_list = []
-        for k, v in resp.json().items():
+        for k, v in resp.items():
             if len(v["aliases"]) > 0:
                 continue
             elif not k.startswith("."):
@@ -40,16 +93,17 @@ def get_indices_wo_alias(
         return False, resp
 
 
+@instrument("es_api")
 def get_indices_wo_alias_except_dev(
-    es_url: str,
+    es_url: str | ESClient,
 ) -> tuple[bool, list] | tuple[bool, requests.Response]:
-    end_point = f"{es_url}/_alias"
+    end_point = "_alias"
 
-    resp = requests.get(end_point)
+    status, resp = _get_json(es_url, end_point)
 
-    if resp.status_code == 200:
+    if status:
         index_list = []
-        for k, v in resp.json().items():
+        for k, v in resp.items():
             if len(v["aliases"]) > 0:
                 dev = True
                 for key in v["aliases"].keys():
@@ -68,24 +122,81 @@ def get_indices_wo_alias_except_dev(
         return False, resp
 
 
-def delete_indices(indices: list, es_url: str):
+def _index_batches(indices: list, max_url_length: int):
+    batch, length = [], 0
+    for index in indices:
+        if batch and length + len(index) + 1 > max_url_length:
+            yield batch
+            batch, length = [], 0
+        batch.append(index)
+        length += len(index) + 1
+    if batch:
+        yield batch
+
+
+def iter_delete_indices(
+    indices: list,
+    es_url: str | ESClient,
+    max_workers: int = DEFAULT_DELETE_WORKERS,
+    max_url_length: int = DEFAULT_DELETE_URL_LENGTH,
+):
+    """
+    index 목록을 comma로 묶은 DELETE 요청으로 나누어 동시에 삭제하고,
+    끝난 순서대로 index 별 결과를 yield
+
+    요청은 같은 cluster의 AsyncESClient connection pool에서 동시에 보낸다.
+    (thread를 요청 수만큼 만들지 않음, metadata cache는 ESClient와 공유)
+
+    Args:
+        indices (list): 삭제할 index 목록
+        es_url (str | ESClient): cluster url 또는 client
+        max_workers (int): 동시에 보낼 DELETE 요청 수
+        max_url_length (int): DELETE 요청 하나의 index 목록 최대 길이
+
+    Yields:
+        dict: {"index", "acknowledged", "error"}
+    """
+    # httpx는 삭제할 때만 import
+    from .es_async import delete_batch, get_async_client
+
+    client = get_client(es_url)
+    async_client = get_async_client(client.es_url)
+    futures = async_client.submit_all(
+        [
+            delete_batch(batch, async_client)
+            for batch in _index_batches(indices, max_url_length)
+        ],
+        limit=max_workers,
+    )
+
+    try:
+        for future in as_completed(futures):
+            yield from future.result()
+    finally:
+        # 중간에 중단된 경우 남은 요청은 보내지 않음
+        for future in futures:
+            future.cancel()
+        client.metadata_cache.invalidate()
+
+
+@instrument("es_api")
+def delete_indices(indices: list, es_url: str | ESClient):
     fail_list = []
 
-    for index in indices:
-        end_point = f"{es_url}/{index}"
-        resp = requests.delete(end_point)
+    for result in iter_delete_indices(indices, es_url):
+        if not result["acknowledged"]:
+            fail_list.append(result)
 
-        if resp.status_code == 200 and resp.json()["acknowledged"] == True:
-            continue
-        else:
-            fail_list.append(resp.json())
     if len(fail_list) == 0:
         return True, fail_list
     else:
         return False, fail_list
 
 
-def get_aliases_via_index_name(index_name: str, es_url: str) -> tuple[bool, dict]:
+@instrument("es_api")
+def get_aliases_via_index_name(
+    index_name: str, es_url: str | ESClient
+) -> tuple[bool, dict]:
     """
     index를 입력받아 해당 index에 할당된 alias를 반환
 
@@ -96,36 +207,35 @@ def get_aliases_via_index_name(index_name: str, es_url: str) -> tuple[bool, dict
     Returns:
         tuple[bool, dict]: _description_
     """
-    end_point = f"{es_url}/{index_name}/_alias"
-
-    resp = requests.get(end_point)
+    end_point = f"{index_name}/_alias"
 
-    # resp = resp.json()
+    status, resp = _get_json(es_url, end_point)
 
-    if resp.status_code == 200:
-        return True, list(resp.json()[index_name]["aliases"].keys())
+    if status:
+        return True, list(resp[index_name]["aliases"].keys())
     else:
-        return False, resp["error"]
-
+        return False, resp.json()["error"]
 
-def get_all_aliases(es_url: str) -> tuple[bool, dict]:
-    import pandas as pd
 
-    end_point = f"{es_url}/_cat/aliases?format=json&s=index:desc"
+@instrument("es_api")
+def get_all_aliases(es_url: str | ESClient) -> tuple[bool, dict]:
+    end_point = "_cat/aliases?format=json&s=index:desc"
 
-    resp = requests.get(end_point)
+    status, resp = _get_json(es_url, end_point)
 
-    if resp.status_code == 200:
-        return True, {
-            alias: group["index"].to_list()
-            for alias, group in pd.DataFrame(resp.json()).groupby("alias")
-            if not alias.startswith(".")
-        }
+    if status:
+        # alias 이름 순, alias 안에서는 index 내림차순 (pandas 없이 groupby와 같은 결과)
+        aliases = {}
+        for row in sorted(resp, key=lambda row: row["alias"]):
+            if not row["alias"].startswith("."):
+                aliases.setdefault(row["alias"], []).append(row["index"])
+        return True, aliases
     else:
         return False, resp
 
 
-def get_indices_via_phrase(phrase: str, es_url: str) -> tuple[bool, DataFrame]:
+@instrument("es_api")
+def get_indices_via_phrase(phrase: str, es_url: str | ESClient) -> tuple[bool, list]:
     """_summary_
 
     Args:
@@ -133,39 +243,91 @@ def get_indices_via_phrase(phrase: str, es_url: str) -> tuple[bool, DataFrame]:
         es_url (str): _description_
 
     Returns:
-        tuple[bool, dict]: _description_
+        tuple[bool, list]: _description_
     """
-    import pandas as pd
-
-    end_point = f"{es_url}/_cat/indices/{phrase}?format=json&s=index:desc"
+    end_point = f"_cat/indices/{phrase}?format=json&s=index:desc"
 
-    resp = requests.get(end_point)
+    status, resp = _get_json(es_url, end_point)
 
-    if resp.status_code == 200:
-        return True, pd.DataFrame(resp.json())["index"].to_list()
+    if status:
+        return True, [row["index"] for row in resp]
     else:
         return False, resp
 
 
+@instrument("es_api")
 def get_all_indices(
-    es_url: str,
-) -> tuple[bool, DataFrame] | tuple[bool, requests.Response]:
-    import pandas as pd
+    es_url: str | ESClient,
+) -> tuple[bool, list] | tuple[bool, requests.Response]:
+    end_point = "_cat/indices?format=json&s=index:desc"
 
-    end_point = f"{es_url}/_cat/indices?format=json&s=index:desc"
+    status, resp = _get_json(es_url, end_point)
 
-    resp = requests.get(end_point)
+    if status:
+        return True, [row["index"] for row in resp]
+    else:
+        return False, resp
 
-    if resp.status_code == 200:
-        return True, pd.DataFrame(resp.json())["index"].to_list()
+
+@instrument("es_api")
+def get_index_inventory(
+    es_url: str | ESClient,
+) -> tuple[bool, list[IndexStats]] | tuple[bool, requests.Response]:
+    """
+    _cat/indices 요청 한번으로 전체 index의 문서 수, 크기(byte), 생성일, health를 반환
+
+    Args:
+        es_url (str | ESClient): cluster url 또는 client
+
+    Returns:
+        tuple[bool, list[IndexStats]]: 실패한 경우 (False, Response)
+    """
+    status, resp = _get_json(es_url, INVENTORY_END_POINT)
+
+    if status:
+        return True, [IndexStats.from_cat(row) for row in resp]
     else:
         return False, resp
 
 
-def change_aliases_old_to_new(old_index, new_index, aliases, es_url):
-    end_point = f"{es_url}/_aliases"
-    headers = {"Content-Type": "application/json; charset=utf-8"}
+@instrument("es_api")
+def get_cluster_snapshot(
+    es_url: str | ESClient,
+    naming_rule: NamingRule = None,
+) -> tuple[bool, ClusterSnapshot] | tuple[bool, requests.Response]:
+    """
+    _alias, _cat/indices 응답으로 ClusterSnapshot을 만들어 반환 (metadata cache 사용)
+
+    Args:
+        es_url (str | ESClient): cluster url 또는 client
+        naming_rule (NamingRule): index family 이름 규칙 (None이면 기본 규칙)
 
+    Returns:
+        tuple[bool, ClusterSnapshot]: 실패한 경우 (False, Response)
+    """
+    client = get_client(es_url)
+    naming_rule = naming_rule or NamingRule()
+    # 이름 규칙마다 family 구성이 다르므로 따로 cache
+    end_point = f"cluster_snapshot:{naming_rule.pattern}"
+
+    hit, snapshot = client.metadata_cache.get(end_point)
+    if hit:
+        return True, snapshot
+
+    status, alias_resp = _get_json(client, "_alias")
+    if not status:
+        return False, alias_resp
+
+    status, cat_indices_resp = _get_json(client, INVENTORY_END_POINT)
+    if not status:
+        return False, cat_indices_resp
+
+    snapshot = ClusterSnapshot(alias_resp, cat_indices_resp, naming_rule)
+    client.metadata_cache.set(end_point, snapshot)
+    return True, snapshot
+
+
+def _alias_switch_actions(old_index, new_index, aliases) -> list[dict]:
     actions = []
 
     for alias in aliases:
@@ -185,10 +347,21 @@ def change_aliases_old_to_new(old_index, new_index, aliases, es_url):
                 }
             }
         )
+    return actions
+
+
+@instrument("es_api")
+def change_aliases_old_to_new(old_index, new_index, aliases, es_url):
+    end_point = "_aliases"
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+
+    actions = _alias_switch_actions(old_index, new_index, aliases)
 
     param = {"actions": actions}
 
-    resp = requests.post(end_point, json=param, headers=headers)
+    client = get_client(es_url)
+    resp = client.post(end_point, json=param, headers=headers)
+    client.metadata_cache.invalidate()
 
     if resp.status_code == 200:
         return True, resp
@@ -196,7 +369,70 @@ def change_aliases_old_to_new(old_index, new_index, aliases, es_url):
         return False, resp
 
 
+@instrument("es_api")
+def change_aliases_bulk(
+    switches: list[tuple[str, str, list[str]]],
+    es_url: str | ESClient,
+    chunk_size: int = DEFAULT_ALIAS_CHUNK_SIZE,
+) -> tuple[bool, list[dict]]:
+    """
+    여러 (old_index, new_index, aliases)의 alias 변경을 _aliases 요청 한번으로 처리
+
+    action 수가 chunk_size를 넘으면 여러 요청으로 나누어 보낸다.
+    한 switch의 remove/add는 항상 같은 요청에 들어가므로 chunk 단위로 atomic하다.
+
+    Args:
+        switches (list[tuple[str, str, list[str]]]): (old_index, new_index, aliases) 목록
+        es_url (str | ESClient): cluster url 또는 client
+        chunk_size (int): 요청 하나에 넣을 최대 action 수
+
+    Returns:
+        tuple[bool, list[dict]]: 전체 성공 여부, action(alias) 별 결과
+    """
+    end_point = "_aliases"
+    headers = {"Content-Type": "application/json; charset=utf-8"}
+
+    chunks = []
+    chunk_actions, chunk_results = [], []
+    for old_index, new_index, aliases in switches:
+        actions = _alias_switch_actions(old_index, new_index, aliases)
+        if chunk_actions and len(chunk_actions) + len(actions) > chunk_size:
+            chunks.append((chunk_actions, chunk_results))
+            chunk_actions, chunk_results = [], []
+        chunk_actions.extend(actions)
+        chunk_results.extend(
+            {"old_index": old_index, "new_index": new_index, "alias": alias}
+            for alias in aliases
+        )
+    if chunk_actions:
+        chunks.append((chunk_actions, chunk_results))
+
+    client = get_client(es_url)
+    results = []
+    for chunk_no, (actions, chunk_results) in enumerate(chunks):
+        try:
+            resp = client.post(end_point, json={"actions": actions}, headers=headers)
+            acknowledged = resp.status_code == 200 and resp.json().get("acknowledged")
+            error = None if acknowledged else str(resp.json().get("error"))
+        except RequestException as e:
+            acknowledged, error = False, str(e)
+
+        for result in chunk_results:
+            result.update(chunk=chunk_no, acknowledged=bool(acknowledged), error=error)
+        results.extend(chunk_results)
+
+    client.metadata_cache.invalidate()
+
+    return all(r["acknowledged"] for r in results), results
+
+
+@instrument("es_api")
 def indexing_ppautocomplete(version, index, locale, conf):
+    # auto_indexing submodule은 import 비용이 커서 색인할 때만 import
+    import asyncio
+
+    from .auto_indexing.src import indexing_service
+
     status, message = asyncio.run(indexing_service(version, index, locale, conf))
 
     if status == 1:
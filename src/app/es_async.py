@@ -0,0 +1,311 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+import httpx
+
+from .es_cache import MetadataCache
+from .metrics import observe_es_request
+from .es_client import (
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_METADATA_TTL,
+    DEFAULT_TIMEOUT,
+    get_client,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 50
+DEFAULT_ASYNC_POOL_SIZE = 100
+HEADERS = {"Content-Type": "application/json; charset=utf-8"}
+
+
+class AsyncESClient:
+    """
+    Elasticsearch cluster 하나에 대한 비동기 connection pool (httpx.AsyncClient)
+
+    event loop을 전용 thread에서 돌리므로 Streamlit 처럼 동기 코드에서도
+    run()으로 coroutine을 실행하며 같은 connection pool을 계속 재사용할 수 있다.
+
+    Args:
+        es_url (str): cluster url (e.g. http://localhost:9200)
+        pool_size (int): 최대 connection 수
+        concurrency (int): fan-out 함수에서 동시에 보낼 최대 요청 수
+        max_retries (int): 연결 실패 시 재시도 횟수
+        timeout (tuple[float, float] | float): (connect, read) timeout
+        metadata_ttl (float): metadata cache 유지 시간(초)
+        metadata_cache (MetadataCache): 같은 cluster의 ESClient와 공유할 cache
+            (None이면 새로 생성)
+    """
+
+    def __init__(
+        self,
+        es_url: str,
+        pool_size: int = DEFAULT_ASYNC_POOL_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        timeout: tuple[float, float] | float = DEFAULT_TIMEOUT,
+        metadata_ttl: float = DEFAULT_METADATA_TTL,
+        metadata_cache: MetadataCache = None,
+    ):
+        self.es_url = es_url.rstrip("/")
+        self.pool_size = pool_size
+        self.concurrency = concurrency
+        self.metadata_cache = metadata_cache or MetadataCache(ttl=metadata_ttl)
+
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        self._client_kwargs = dict(
+            base_url=self.es_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size
+            ),
+            transport=httpx.AsyncHTTPTransport(retries=max_retries),
+        )
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="es-async-loop", daemon=True
+        )
+        self._thread.start()
+        # AsyncClient는 사용할 event loop 안에서 생성
+        self.client: httpx.AsyncClient = self.run(self._create_client())
+
+    async def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(**self._client_kwargs)
+
+    def __repr__(self):
+        return f"AsyncESClient({self.es_url!r}, pool_size={self.pool_size})"
+
+    def run(self, coro):
+        """
+        coroutine을 client의 event loop에서 실행하고 결과를 반환 (sync facade)
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def submit_all(self, coros: list, limit: int = None) -> list[Future]:
+        """
+        coroutine들을 최대 limit 개씩 동시에 실행하도록 event loop에 넣고 Future 목록을 반환
+
+        동기 코드에서 concurrent.futures.as_completed로 끝난 순서대로 결과를 받을 수 있다.
+        """
+        semaphore = asyncio.Semaphore(limit or self.concurrency)
+
+        async def limited(coro):
+            async with semaphore:
+                return await coro
+
+        return [
+            asyncio.run_coroutine_threadsafe(limited(coro), self._loop)
+            for coro in coros
+        ]
+
+    async def request(self, method: str, path: str = "", **kwargs) -> httpx.Response:
+        start_time = time.perf_counter()
+        resp = None
+        try:
+            resp = await self.client.request(method, "/" + path.lstrip("/"), **kwargs)
+            return resp
+        finally:
+            observe_es_request(method, path, time.perf_counter() - start_time, resp)
+
+    def close(self):
+        self.run(self.client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+async def _get_json(
+    client: AsyncESClient, end_point: str, cached: bool = True
+) -> tuple[bool, object] | tuple[bool, httpx.Response]:
+    if cached:
+        hit, data = client.metadata_cache.get(end_point)
+        if hit:
+            return True, data
+
+    resp = await client.request("GET", end_point)
+
+    if resp.status_code != 200:
+        return False, resp
+
+    data = resp.json()
+    if cached:
+        client.metadata_cache.set(end_point, data)
+    return True, data
+
+
+async def _gather_limited(client: AsyncESClient, coros: list) -> list:
+    semaphore = asyncio.Semaphore(client.concurrency)
+
+    async def limited(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(limited(coro) for coro in coros))
+
+
+async def get_all_aliases(
+    client: AsyncESClient,
+) -> tuple[bool, dict] | tuple[bool, httpx.Response]:
+    status, resp = await _get_json(client, "_cat/aliases?format=json&s=index:desc")
+
+    if status:
+        aliases = {}
+        for row in resp:
+            if not row["alias"].startswith("."):
+                aliases.setdefault(row["alias"], []).append(row["index"])
+        return True, dict(sorted(aliases.items()))
+    else:
+        return False, resp
+
+
+async def get_all_indices(
+    client: AsyncESClient,
+) -> tuple[bool, list] | tuple[bool, httpx.Response]:
+    status, resp = await _get_json(client, "_cat/indices?format=json&s=index:desc")
+
+    if status:
+        return True, [row["index"] for row in resp]
+    else:
+        return False, resp
+
+
+async def get_indices_via_phrase(
+    phrase: str, client: AsyncESClient
+) -> tuple[bool, list] | tuple[bool, httpx.Response]:
+    status, resp = await _get_json(
+        client, f"_cat/indices/{phrase}?format=json&s=index:desc"
+    )
+
+    if status:
+        return True, [row["index"] for row in resp]
+    else:
+        return False, resp
+
+
+async def get_indices_via_phrases(
+    phrases: list[str], client: AsyncESClient
+) -> dict[str, tuple[bool, list]]:
+    """
+    여러 phrase에 대한 _cat/indices 요청을 동시에 보내 phrase 별 결과를 반환
+    """
+    results = await _gather_limited(
+        client, [get_indices_via_phrase(phrase, client) for phrase in phrases]
+    )
+    return dict(zip(phrases, results))
+
+
+async def get_aliases_via_index_name(
+    index_name: str, client: AsyncESClient
+) -> tuple[bool, list] | tuple[bool, dict]:
+    status, resp = await _get_json(client, f"{index_name}/_alias")
+
+    if status:
+        return True, list(resp[index_name]["aliases"].keys())
+    else:
+        return False, resp.json()["error"]
+
+
+async def get_aliases_via_index_names(
+    index_names: list[str], client: AsyncESClient
+) -> dict[str, tuple[bool, list]]:
+    """
+    여러 index의 alias 조회 요청을 동시에 보내 index 별 결과를 반환
+    """
+    results = await _gather_limited(
+        client, [get_aliases_via_index_name(index, client) for index in index_names]
+    )
+    return dict(zip(index_names, results))
+
+
+async def change_aliases_old_to_new(
+    old_index, new_index, aliases, client: AsyncESClient
+) -> tuple[bool, httpx.Response]:
+    actions = []
+    for alias in aliases:
+        actions.append({"remove": {"index": f"{old_index}", "alias": f"{alias}"}})
+        actions.append({"add": {"index": f"{new_index}", "alias": f"{alias}"}})
+
+    resp = await client.request(
+        "POST", "_aliases", json={"actions": actions}, headers=HEADERS
+    )
+    client.metadata_cache.invalidate()
+
+    return resp.status_code == 200, resp
+
+
+async def delete_batch(batch: list, client: AsyncESClient) -> list[dict]:
+    """
+    comma로 묶은 index 목록을 DELETE 요청 하나로 삭제하고 index 별 결과를 반환
+
+    batch 전체가 실패하면 index 단위로 다시 시도한다.
+    json이 아닌 응답(proxy 오류 페이지 등)은 응답 본문을 error로 남긴다.
+    """
+    try:
+        resp = await client.request("DELETE", ",".join(batch))
+        try:
+            body = resp.json()
+        except ValueError:
+            body = None
+        if resp.status_code == 200 and body and body.get("acknowledged") == True:
+            return [
+                {"index": index, "acknowledged": True, "error": None} for index in batch
+            ]
+        error = body if body is not None else f"{resp.status_code} {resp.text}"
+    except httpx.HTTPError as e:
+        error = str(e)
+
+    if len(batch) == 1:
+        return [{"index": batch[0], "acknowledged": False, "error": error}]
+
+    results = []
+    for index in batch:
+        results.extend(await delete_batch([index], client))
+    return results
+
+
+async def delete_indices(
+    indices: list, client: AsyncESClient, max_url_length: int = None
+) -> tuple[bool, list[dict]]:
+    """
+    index 목록을 comma로 묶은 DELETE 요청으로 나누어 client.concurrency 만큼 동시에 삭제
+    """
+    from .es_api import DEFAULT_DELETE_URL_LENGTH, _index_batches
+
+    batches = _index_batches(indices, max_url_length or DEFAULT_DELETE_URL_LENGTH)
+    try:
+        results = await _gather_limited(
+            client, [delete_batch(batch, client) for batch in batches]
+        )
+    finally:
+        client.metadata_cache.invalidate()
+
+    fail_list = [r for batch in results for r in batch if not r["acknowledged"]]
+    return len(fail_list) == 0, fail_list
+
+
+_clients: dict[str, AsyncESClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_async_client(es_url: "str | AsyncESClient") -> AsyncESClient:
+    """
+    es_url에 해당하는 공유 AsyncESClient를 반환 (없으면 생성)
+
+    같은 url의 ESClient와 metadata cache를 공유하므로, 어느 쪽에서 alias 변경이나
+    index 삭제를 해도 양쪽 cache가 함께 비워진다.
+    """
+    if isinstance(es_url, AsyncESClient):
+        return es_url
+
+    key = es_url.rstrip("/")
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            logger.info(f"create async es client: {key}")
+            client = AsyncESClient(key, metadata_cache=get_client(key).metadata_cache)
+            _clients[key] = client
+    return client
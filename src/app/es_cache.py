@@ -0,0 +1,51 @@
+import threading
+import time
+
+
+class MetadataCache:
+    """
+    cluster metadata(_alias, _cat/aliases, _cat/indices 등) 응답 캐시
+
+    endpoint 별로 응답을 ttl(초) 동안 보관하고, hit/miss 횟수를 기록한다.
+    alias 변경, index 삭제 등 cluster 상태가 바뀌면 invalidate()로 비운다.
+    """
+
+    def __init__(self, ttl: float = 60):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: dict[str, tuple[float, object]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple[bool, object]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key: str, value: object):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+
+    def invalidate(self, key: str | None = None):
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._data),
+                "ttl": self.ttl,
+            }
@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .es_cache import MetadataCache
+from .metrics import observe_es_request
+
+logger = logging.getLogger(__name__)
+
+# (connect timeout, read timeout)
+DEFAULT_TIMEOUT = (5, 60)
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.3
+DEFAULT_METADATA_TTL = 60
+
+
+class ESClient:
+    """
+    Elasticsearch cluster 하나에 대한 keep-alive connection pool
+
+    requests.Session 하나를 공유하여 TCP/TLS 연결을 재사용하고,
+    일시적인 오류(502/503/504, 연결 실패)는 backoff를 두고 재시도한다.
+
+    Args:
+        es_url (str): cluster url (e.g. http://localhost:9200)
+        pool_size (int): host 당 유지할 최대 connection 수
+        max_retries (int): 재시도 횟수
+        backoff_factor (float): 재시도 간격 계수
+        timeout (tuple[float, float] | float): 기본 (connect, read) timeout
+        metadata_ttl (float): metadata cache 유지 시간(초)
+    """
+
+    def __init__(
+        self,
+        es_url: str,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        timeout: tuple[float, float] | float = DEFAULT_TIMEOUT,
+        metadata_ttl: float = DEFAULT_METADATA_TTL,
+    ):
+        self.es_url = es_url.rstrip("/")
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.metadata_cache = MetadataCache(ttl=metadata_ttl)
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            # POST(_aliases 등)는 재시도 시 중복 적용될 수 있으므로 제외
+            allowed_methods=frozenset(["HEAD", "GET", "PUT", "DELETE"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+        )
+
+        self.session = requests.Session()
+        self.session.headers.update({"Connection": "keep-alive"})
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __repr__(self):
+        return f"ESClient({self.es_url!r}, pool_size={self.pool_size})"
+
+    def url(self, path: str = "") -> str:
+        if not path:
+            return self.es_url
+        return f"{self.es_url}/{path.lstrip('/')}"
+
+    def request(self, method: str, path: str = "", **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        start_time = time.perf_counter()
+        resp = None
+        try:
+            resp = self.session.request(method, self.url(path), **kwargs)
+            return resp
+        finally:
+            observe_es_request(method, path, time.perf_counter() - start_time, resp)
+
+    def get(self, path: str = "", **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str = "", **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def delete(self, path: str = "", **kwargs) -> requests.Response:
+        return self.request("DELETE", path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_clients: dict[str, ESClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(es_url: "str | ESClient") -> ESClient:
+    """
+    es_url에 해당하는 공유 ESClient를 반환 (없으면 생성)
+
+    ESClient가 그대로 들어오면 그 객체를 반환하므로
+    es_api 함수들은 url 문자열과 client 모두 받을 수 있다.
+    """
+    if isinstance(es_url, ESClient):
+        return es_url
+
+    key = es_url.rstrip("/")
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            logger.info(f"create es client: {key}")
+            client = ESClient(key)
+            _clients[key] = client
+    return client
@@ -0,0 +1,141 @@
+from datetime import datetime
+from typing import NamedTuple
+
+from .index_family import IndexFamilies, NamingRule
+
+# _cat/indices 에서 받아오는 컬럼 (bytes=b: store.size를 byte 단위 정수로)
+INVENTORY_COLUMNS = "index,docs.count,store.size,creation.date,health"
+
+
+class IndexStats(NamedTuple):
+    """
+    _cat/indices row 하나를 타입 변환한 index 통계 (closed index는 값이 None)
+    """
+
+    index: str
+    docs_count: int | None
+    store_size: int | None
+    creation_date: datetime | None
+    health: str | None
+
+    @classmethod
+    def from_cat(cls, row: dict) -> "IndexStats":
+        return cls(
+            index=row["index"],
+            docs_count=_to_int(row.get("docs.count")),
+            store_size=_to_int(row.get("store.size")),
+            creation_date=(
+                None
+                if _to_int(row.get("creation.date")) is None
+                else datetime.fromtimestamp(int(row["creation.date"]) / 1000)
+            ),
+            health=row.get("health"),
+        )
+
+    def age_days(self, now: datetime = None) -> float | None:
+        if self.creation_date is None:
+            return None
+        return ((now or datetime.now()) - self.creation_date).total_seconds() / 86400
+
+
+def _to_int(value) -> int | None:
+    if value is None or value == "":
+        return None
+    return int(value)
+
+
+def format_bytes(size: int | None) -> str:
+    if size is None:
+        return ""
+    for unit in ["b", "kb", "mb", "gb", "tb"]:
+        if abs(size) < 1024 or unit == "tb":
+            return f"{size:.1f}{unit}" if unit != "b" else f"{size}{unit}"
+        size /= 1024
+
+
+def index_suffix(index_name: str, rule: NamingRule = None) -> str:
+    """
+    index 이름에서 버전/날짜 prefix를 제외한 부분을 반환 (기본: 첫번째 "_" 이후)
+
+    e.g. 20240101_patent_ko -> patent_ko
+    """
+    return (rule or NamingRule()).split(index_name)[1]
+
+
+class ClusterSnapshot:
+    """
+    특정 시점의 cluster index/alias 상태
+
+    _alias 와 _cat/indices 응답 한번으로 만들어지며, 이후 family(suffix) 매칭과
+    alias 조회, index 통계 조회는 HTTP 요청 없이 dict 조회로 처리한다.
+
+    Args:
+        alias_resp (dict): GET _alias 응답
+        cat_indices_resp (list[dict]): GET _cat/indices?format=json 응답
+            (h=INVENTORY_COLUMNS 인 경우 index 통계 포함)
+        naming_rule (NamingRule): family를 나누는 이름 규칙 (None이면 기본 규칙)
+    """
+
+    def __init__(
+        self,
+        alias_resp: dict,
+        cat_indices_resp: list[dict],
+        naming_rule: NamingRule = None,
+    ):
+        index_names = {row["index"] for row in cat_indices_resp}
+        index_names.update(alias_resp.keys())
+
+        # index 이름 내림차순 (최신 버전이 앞)
+        self.indices: list[str] = sorted(index_names, reverse=True)
+        self.index_aliases: dict[str, list[str]] = {}
+        self.alias_indices: dict[str, list[str]] = {}
+        self.stats: dict[str, IndexStats] = {
+            row["index"]: IndexStats.from_cat(row) for row in cat_indices_resp
+        }
+
+        for index in self.indices:
+            aliases = sorted(alias_resp.get(index, {}).get("aliases", {}).keys())
+            self.index_aliases[index] = aliases
+            for alias in aliases:
+                self.alias_indices.setdefault(alias, []).append(index)
+        self.families = IndexFamilies(self.indices, naming_rule)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __contains__(self, index_name: str):
+        return index_name in self.index_aliases
+
+    def aliases_of(self, index_name: str) -> list[str]:
+        return list(self.index_aliases.get(index_name, []))
+
+    def indices_of(self, alias: str) -> list[str]:
+        return list(self.alias_indices.get(alias, []))
+
+    def indices_via_suffix(self, suffix: str) -> list[str]:
+        return self.families.family(suffix)
+
+    def siblings(self, index_name: str, include_self: bool = True) -> list[str]:
+        """
+        index_name과 같은 family의 index 목록 (최신 버전 순)
+        """
+        return self.families.siblings(index_name, include_self=include_self)
+
+    def latest_sibling(self, index_name: str, include_self: bool = True) -> str | None:
+        return self.families.latest(index_name, include_self=include_self)
+
+    def stats_of(self, index_name: str) -> IndexStats:
+        stats = self.stats.get(index_name)
+        if stats is None:
+            return IndexStats(index_name, None, None, None, None)
+        return stats
+
+    def unaliased(self) -> list[str]:
+        """
+        alias가 없는 index 목록 (시스템 index(.) 제외, 오름차순)
+        """
+        return sorted(
+            index
+            for index, aliases in self.index_aliases.items()
+            if len(aliases) == 0 and not index.startswith(".")
+        )
@@ -0,0 +1,121 @@
+import re
+
+# 기본 이름 규칙: 첫번째 "_" 앞이 버전/날짜 prefix, 나머지가 suffix
+# e.g. 20240101_patent_ko -> (20240101, patent_ko)
+DEFAULT_NAMING_PATTERN = r"^(?P<prefix>[^_]+)_(?P<suffix>.+)$"
+
+# 규칙에 맞지 않는 이름의 family key 앞에 붙이는 문자
+# (index 이름에 쓸 수 없는 문자이므로 규칙에 맞는 이름의 suffix와 겹치지 않음)
+UNMATCHED_PREFIX = "#"
+
+_DIGITS = re.compile(r"(\d+)")
+
+
+def version_key(prefix: str) -> tuple:
+    """
+    prefix의 숫자 부분을 숫자로 비교하는 정렬 key (v9 < v10, 20240101 < 20240201)
+    """
+    return tuple(
+        (1, int(part), "") if part.isdigit() else (0, 0, part)
+        for part in _DIGITS.split(prefix)
+        if part
+    )
+
+
+class NamingRule:
+    """
+    index 이름을 (prefix, suffix)로 나누는 규칙
+
+    pattern은 prefix, suffix named group을 가진 정규식이다.
+    규칙에 맞지 않는 이름은 이름 전체를 suffix로 보고, family key에는
+    UNMATCHED_PREFIX를 붙여 혼자 family가 된다. (suffix는 모두 소문자)
+
+    Args:
+        pattern (str): 정규식 (e.g. r"^(?P<suffix>.+)_v(?P<prefix>\\d+)$")
+    """
+
+    def __init__(self, pattern: str = DEFAULT_NAMING_PATTERN):
+        self.pattern = pattern
+        self._regex = re.compile(pattern)
+        if not {"prefix", "suffix"} <= set(self._regex.groupindex):
+            raise ValueError(f"pattern needs prefix and suffix groups: {pattern}")
+
+    def __repr__(self):
+        return f"NamingRule({self.pattern!r})"
+
+    def split(self, index_name: str) -> tuple[str, str]:
+        prefix, key = self.family_key(index_name)
+        return prefix, key.removeprefix(UNMATCHED_PREFIX)
+
+    def family_key(self, index_name: str) -> tuple[str, str]:
+        """
+        (prefix, family key), 규칙에 맞지 않는 이름은 ("", UNMATCHED_PREFIX + 이름)
+        """
+        match = self._regex.match(index_name)
+        if match is None:
+            return "", UNMATCHED_PREFIX + index_name.lower()
+        return match.group("prefix"), match.group("suffix").lower()
+
+
+class IndexFamilies:
+    """
+    suffix가 같은 index끼리 묶은 family (최신 버전이 앞)
+
+    snapshot을 만들 때 한번 만들어지며, 이후 family/latest sibling 조회는
+    정규식이나 HTTP 요청 없이 dict 조회로 처리한다.
+
+    Args:
+        indices (list[str]): index 이름 목록
+        rule (NamingRule): 이름 규칙 (None이면 기본 규칙)
+    """
+
+    def __init__(self, indices: list[str], rule: NamingRule = None):
+        self.rule = rule or NamingRule()
+        self.families: dict[str, list[str]] = {}
+        self._suffix: dict[str, str] = {}
+
+        versions = {}
+        for index in indices:
+            prefix, suffix = self.rule.family_key(index)
+            self._suffix[index] = suffix
+            versions[index] = version_key(prefix)
+            self.families.setdefault(suffix, []).append(index)
+        for family in self.families.values():
+            family.sort(key=lambda index: (versions[index], index), reverse=True)
+
+    def __len__(self):
+        return len(self.families)
+
+    def __contains__(self, index_name: str):
+        return index_name in self._suffix
+
+    def suffix_of(self, index_name: str) -> str | None:
+        return self._suffix.get(index_name)
+
+    def matched(self, index_name: str) -> bool:
+        """
+        index_name이 이름 규칙에 맞는지 여부 (맞지 않으면 혼자 family)
+        """
+        suffix = self._suffix.get(index_name)
+        return suffix is not None and not suffix.startswith(UNMATCHED_PREFIX)
+
+    def family(self, suffix: str) -> list[str]:
+        return list(self.families.get(suffix, []))
+
+    def siblings(self, index_name: str, include_self: bool = True) -> list[str]:
+        """
+        index_name과 같은 family의 index 목록 (최신 순)
+        """
+        siblings = self.family(self.suffix_of(index_name))
+        if not include_self and index_name in siblings:
+            siblings.remove(index_name)
+        return siblings
+
+    def latest(self, index_name: str, include_self: bool = True) -> str | None:
+        """
+        index_name과 같은 family에서 가장 최신 index
+        """
+        for index in self.families.get(self.suffix_of(index_name), []):
+            if include_self or index != index_name:
+                return index
+        return None
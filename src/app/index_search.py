@@ -0,0 +1,88 @@
+import math
+import re
+from functools import lru_cache
+
+# index 이름을 token으로 나누는 구분자
+TOKEN_SEPARATORS = re.compile(r"[_\-.]+")
+DEFAULT_PAGE_SIZE = 100
+
+
+def tokenize(name: str) -> list[str]:
+    return [token for token in TOKEN_SEPARATORS.split(name.lower()) if token]
+
+
+class IndexSearch:
+    """
+    index 이름 목록에 대한 token 역색인
+
+    검색어마다 전체 목록을 다시 훑지 않고, 이름을 구분자(_ - .)로 나눈 token에서
+    후보를 찾는다. 결과는 모든 검색어가 이름에 포함된(substring) index이다.
+    검색어는 대소문자를 구분하지 않고 문자 그대로 비교한다. (정규식 아님)
+    이전의 str.contains 검색은 대소문자를 구분하고 검색어를 정규식으로 해석했으므로
+    "."나 "*" 등이 들어간 검색어는 결과가 다를 수 있다.
+
+    Args:
+        names (list[str]): index 이름 목록 (순서 유지)
+    """
+
+    def __init__(self, names: list[str]):
+        self.names = list(names)
+        self._lower = [name.lower() for name in self.names]
+        self._postings: dict[str, set[int]] = {}
+        for i, name in enumerate(self._lower):
+            for token in tokenize(name):
+                self._postings.setdefault(token, set()).add(i)
+        self._tokens = list(self._postings.keys())
+        # 같은 검색어 조각은 다시 token 목록을 훑지 않도록 cache
+        self._match_part = lru_cache(maxsize=1024)(self._match_part)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _match_part(self, part: str) -> frozenset[int]:
+        ids = set()
+        for token in self._tokens:
+            if part in token:
+                ids |= self._postings[token]
+        return frozenset(ids)
+
+    def _match_word(self, word: str) -> set[int]:
+        parts = tokenize(word)
+        if not parts:
+            return {i for i, name in enumerate(self._lower) if word in name}
+        ids = set(self._match_part(parts[0]))
+        for part in parts[1:]:
+            ids &= self._match_part(part)
+        # 구분자를 포함한 검색어는 token 단위 후보를 실제 이름과 다시 비교
+        if len(parts) > 1 or parts[0] != word:
+            ids = {i for i in ids if word in self._lower[i]}
+        return ids
+
+    def search(self, words: list[str] | str) -> list[str]:
+        """
+        모든 검색어를 포함하는 index 이름 목록 (원래 순서 유지)
+        """
+        if isinstance(words, str):
+            words = words.split(" ")
+        words = [word.lower() for word in words if word.strip()]
+        if not words:
+            return list(self.names)
+
+        ids = self._match_word(words[0])
+        for word in words[1:]:
+            if not ids:
+                break
+            ids &= self._match_word(word)
+        return [self.names[i] for i in sorted(ids)]
+
+
+def paginate(items: list, page: int, page_size: int = DEFAULT_PAGE_SIZE) -> list:
+    """
+    page(1부터 시작) 번째 page_size 개의 항목
+    """
+    start = (max(page, 1) - 1) * page_size
+    return items[start : start + page_size]
+
+
+def page_count(total: int, page_size: int = DEFAULT_PAGE_SIZE) -> int:
+    return max(math.ceil(total / page_size), 1)
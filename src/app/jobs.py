@@ -0,0 +1,230 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_WORKERS = 4
+# 완료된 job을 보관할 최대 개수 (오래된 순으로 정리)
+DEFAULT_MAX_FINISHED_JOBS = 50
+# 실행 중인 작업의 진행 상황(fragment)을 다시 그리는 간격(초)
+DEFAULT_POLL_INTERVAL = 0.5
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    """
+    background에서 실행되는 작업 하나 (migration, index 삭제, alias 변경 등)
+
+    작업 함수는 job을 첫번째 인자로 받아 update()로 진행 상황을 남기고,
+    반환값은 result에 저장된다. 작업 함수 안에서는 streamlit API를 호출하지 않는다.
+
+    Args:
+        kind (str): 작업 종류 (e.g. "migrate", "delete_indices")
+        title (str): 화면에 보여줄 작업 설명
+        owner (str): 작업을 실행한 browser tab의 token (다른 사용자에게 보이지 않도록)
+        temp_job_id (str): 작업이 읽는 temp 하위 디렉토리 (실행 중에는 정리하지 않음)
+    """
+
+    def __init__(
+        self, kind: str, title: str, owner: str = None, temp_job_id: str = None
+    ):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.title = title
+        self.owner = owner
+        self.temp_job_id = temp_job_id
+
+        self.state = PENDING
+        self.progress = 0.0
+        self.message = ""
+        # 진행 중 화면에 보여줄 추가 상태 (e.g. MigrationScheduler)
+        self.data: dict = {}
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+
+    def __repr__(self):
+        return f"Job({self.id}, {self.kind}, state={self.state})"
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (DONE, FAILED)
+
+    @property
+    def elapsed(self) -> timedelta:
+        if self.started_at is None:
+            return timedelta()
+        return (self.finished_at or datetime.now()) - self.started_at
+
+    def update(self, progress: float = None, message: str = None):
+        if progress is not None:
+            self.progress = min(max(progress, 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "title": self.title,
+            "owner": self.owner,
+            "state": self.state,
+            "progress": self.progress,
+            "message": self.message,
+            "created_at": self.created_at.isoformat(sep=" ", timespec="seconds"),
+            "elapsed": str(self.elapsed),
+            "error": None if self.error is None else str(self.error),
+        }
+
+
+class JobRunner:
+    """
+    Streamlit script thread와 분리된 background 작업 실행기
+
+    작업은 server process 안의 thread pool에서 실행되므로 page rerun이나
+    browser tab 새로고침과 관계없이 계속 진행되며, page는 job id로 상태를 조회한다.
+
+    Args:
+        max_workers (int): 동시에 실행할 최대 작업 수
+        max_finished_jobs (int): 보관할 완료 작업 수
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_JOB_WORKERS,
+        max_finished_jobs: int = DEFAULT_MAX_FINISHED_JOBS,
+    ):
+        self.max_finished_jobs = max_finished_jobs
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job"
+        )
+
+    def _run(self, job: Job, fn: Callable, args: tuple, kwargs: dict):
+        job.state = RUNNING
+        job.started_at = datetime.now()
+        logger.info(f"start job: {job.id} {job.kind} {job.title}")
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.progress = 1.0
+            job.state = DONE
+        except Exception as e:
+            logger.error(f"Fail: job {job.id} {job.kind}")
+            logger.exception(e)
+            job.state, job.error = FAILED, e
+        finally:
+            job.finished_at = datetime.now()
+            logger.info(f"finish job: {job.id} {job.state} {job.elapsed}")
+
+    def submit(
+        self,
+        kind: str,
+        title: str,
+        fn: Callable,
+        *args,
+        owner: str = None,
+        temp_job_id: str = None,
+        **kwargs,
+    ) -> str:
+        """
+        fn(job, *args, **kwargs)를 background에서 실행하고 job id를 반환
+        """
+        job = Job(kind, title, owner, temp_job_id)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, kind: str = None, owner: str = None) -> list[Job]:
+        """
+        작업 목록 (최신 순, owner가 주어지면 그 owner의 작업만)
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if kind is not None:
+            jobs = [job for job in jobs if job.kind == kind]
+        if owner is not None:
+            jobs = [job for job in jobs if job.owner == owner]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def latest(self, kind: str, owner: str, running_only: bool = False) -> Job | None:
+        """
+        owner의 가장 최근 작업 (tab을 닫은 사이 끝난 작업도 결과를 볼 수 있도록 포함)
+        """
+        if owner is None:
+            return None
+        for job in self.jobs(kind, owner):
+            if not running_only or not job.finished:
+                return job
+        return None
+
+    def temp_job_ids(self) -> tuple[str]:
+        """
+        끝나지 않은 작업이 사용 중인 temp 하위 디렉토리 목록 (TempManager.evict의 protect)
+        """
+        return tuple(
+            {
+                job.temp_job_id
+                for job in self.jobs()
+                if job.temp_job_id is not None and not job.finished
+            }
+        )
+
+    def wait(self, job_id: str, timeout: float = None) -> bool:
+        """
+        job이 끝날 때까지(또는 timeout 동안) 대기하고 완료 여부를 반환
+        """
+        job = self.get(job_id)
+        deadline = None if timeout is None else time.time() + timeout
+        while job is not None and not job.finished:
+            if deadline is not None and time.time() >= deadline:
+                break
+            time.sleep(0.1)
+        return job is None or job.finished
+
+    def _prune(self):
+        # owner, kind 별 마지막 작업은 개수와 관계없이 남김
+        latest = {}
+        for job in self._jobs.values():
+            key = (job.owner, job.kind)
+            if key not in latest or job.created_at > latest[key].created_at:
+                latest[key] = job
+        keep = {job.id for job in latest.values()}
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished and job.id not in keep),
+            key=lambda job: job.finished_at,
+        )
+        for job in finished[: max(len(finished) - self.max_finished_jobs, 0)]:
+            del self._jobs[job.id]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+_job_runner = None
+_job_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    global _job_runner
+    with _job_runner_lock:
+        if _job_runner is None:
+            _job_runner = JobRunner()
+    return _job_runner
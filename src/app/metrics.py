@@ -0,0 +1,265 @@
+import bisect
+import functools
+import logging
+import os
+import threading
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.join(FILE_DIR, "../../")
+# node_exporter textfile collector 등으로 수집할 수 있는 prometheus text 형식 파일
+METRICS_PATH = os.path.join(BASE_DIR, "logs", "metrics.prom")
+DEFAULT_FLUSH_INTERVAL = 15
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(k)} {v}" for k, v in values.items()]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        # label -> [bucket 별 count..., +Inf count, sum]
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = {k: list(v) for k, v in self._values.items()}
+        lines = []
+        for key, counts in values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts[:-1]):
+                cumulative += count
+                le = (("le", str(bound)),)
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(key, le)} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(key)} {counts[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    process 안의 metric 모음 (prometheus text 형식으로 출력)
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+        self._lock = threading.Lock()
+        self._flush_thread = None
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._register(Counter(name, help))
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        return self._register(Gauge(name, help))
+
+    def histogram(
+        self, name: str, help: str, buckets: tuple = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str = METRICS_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 수집기가 쓰는 도중의 파일을 읽지 않도록 임시 파일에 쓰고 교체
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(temp_path, path)
+
+    def start_flush(
+        self, path: str = METRICS_PATH, interval: float = DEFAULT_FLUSH_INTERVAL
+    ):
+        """
+        interval 초마다 path에 metric을 쓰는 daemon thread 시작 (한번만)
+        """
+        with self._lock:
+            if self._flush_thread is not None:
+                return
+
+            def flush():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        self.write(path)
+                    except OSError as e:
+                        logger.warning(f"Fail: write metrics {e}")
+
+            self._flush_thread = threading.Thread(
+                target=flush, name="metrics-flush", daemon=True
+            )
+            self._flush_thread.start()
+
+
+registry = MetricsRegistry()
+
+CALL_SECONDS = registry.histogram(
+    "simple_tools_call_seconds", "es_api/db_api function latency"
+)
+CALL_ERRORS = registry.counter(
+    "simple_tools_call_errors_total", "es_api/db_api failed calls"
+)
+ES_REQUEST_SECONDS = registry.histogram(
+    "simple_tools_es_request_seconds", "Elasticsearch http request latency"
+)
+ES_RESPONSE_BYTES = registry.counter(
+    "simple_tools_es_response_bytes_total", "Elasticsearch response body bytes"
+)
+ES_RETRIES = registry.counter(
+    "simple_tools_es_retries_total", "Elasticsearch request retries"
+)
+DB_ROWS = registry.counter("simple_tools_db_rows_total", "rows written to mongodb")
+DB_ROWS_PER_SECOND = registry.gauge(
+    "simple_tools_db_rows_per_second", "rows/s of the last finished import"
+)
+
+
+def es_endpoint(path: str) -> str:
+    """
+    request path를 label로 쓸 수 있게 정규화 (index 이름은 {index}로 치환)
+
+    e.g. 20240101_a,20240102_b/_alias?pretty -> {index}/_alias,
+    _cat/indices/*ko -> _cat/indices/{index}
+    """
+    path = path.split("?", 1)[0].strip("/")
+    if not path:
+        return "/"
+    segments = path.split("/")
+    return "/".join(
+        # _cat 다음은 api 이름 (e.g. _cat/indices)
+        segment if segment.startswith("_") or prev == "_cat" else "{index}"
+        for prev, segment in zip([""] + segments, segments)
+    )
+
+
+def observe_es_request(method: str, path: str, seconds: float, resp=None):
+    endpoint = es_endpoint(path)
+    status = "error" if resp is None else str(resp.status_code)
+    ES_REQUEST_SECONDS.observe(seconds, method=method, endpoint=endpoint, status=status)
+    if resp is None:
+        return
+    ES_RESPONSE_BYTES.inc(len(resp.content), method=method, endpoint=endpoint)
+    retries = getattr(getattr(resp, "raw", None), "retries", None)
+    if retries is not None and len(retries.history) > 0:
+        ES_RETRIES.inc(len(retries.history), method=method, endpoint=endpoint)
+
+
+def observe_rows(collection: str, operation: str, rows: int):
+    DB_ROWS.inc(rows, collection=collection, operation=operation)
+
+
+def observe_throughput(collection: str, operation: str, rows: int, seconds: float):
+    if seconds > 0:
+        DB_ROWS_PER_SECOND.set(
+            rows / seconds, collection=collection, operation=operation
+        )
+
+
+def _target(args: tuple, kwargs: dict) -> str:
+    # collection 인자가 있으면 collection 이름을 label로 사용
+    collection = kwargs.get("collection")
+    if collection is None:
+        collection = next((a for a in args if hasattr(a, "full_name")), None)
+    return getattr(collection, "name", collection) or ""
+
+
+def instrument(module: str) -> Callable:
+    """
+    함수 호출 시간과 실패(예외 또는 (False, ...) 반환)를 기록하는 decorator
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            labels = dict(
+                module=module, function=func.__name__, target=_target(args, kwargs)
+            )
+            start_time = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                CALL_ERRORS.inc(**labels)
+                raise
+            finally:
+                CALL_SECONDS.observe(time.perf_counter() - start_time, **labels)
+            if isinstance(result, tuple) and len(result) > 0 and result[0] is False:
+                CALL_ERRORS.inc(**labels)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,196 @@
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable
+
+from .spans import StageSpans, span_context
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_PER_HOST = 2
+DEFAULT_INDEX_WORKERS = 2
+
+PENDING = "pending"
+IMPORTING = "importing"
+INDEXING = "indexing"
+DONE = "done"
+FAILED = "failed"
+
+
+class MigrationJob:
+    """
+    collection 하나의 migration 작업 (import -> index 생성)
+
+    Args:
+        name (str): 작업 이름 (보통 collection 이름)
+        import_fn (Callable[[Callable[[int], None]], int]): 적재 함수.
+            진행 상황 callback(누적 document 수)을 받고 적재된 document 수를 반환
+        index_fn (Callable[[], list[dict]]): index 생성 함수 (None이면 생략).
+            index 별 생성 결과 목록을 반환
+        host (str): RDB host 별 동시 실행 제한에 쓰이는 key (None이면 제한 없음)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        import_fn: Callable[[Callable[[int], None]], int],
+        index_fn: Callable[[], list[dict]] = None,
+        host: str = None,
+    ):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.import_fn = import_fn
+        self.index_fn = index_fn
+        self.host = host
+
+        self.state = PENDING
+        self.count = 0
+        self.error = None
+        self.import_time = timedelta()
+        self.index_time = timedelta()
+        self.index_report: list[dict] = []
+
+    def _progress(self, count: int):
+        self.count = count
+
+    def to_dict(self) -> dict:
+        return {
+            "job": self.name,
+            "host": self.host,
+            "state": self.state,
+            "documents": self.count,
+            "import_time": str(self.import_time),
+            "index_time": str(self.index_time),
+            "error": None if self.error is None else str(self.error),
+        }
+
+
+class MigrationScheduler:
+    """
+    서로 독립적인 MigrationJob들을 동시에 실행
+
+    import 단계는 전체 max_workers, RDB host 당 max_per_host 만큼만 동시에 실행되고,
+    host 한도를 넘은 job은 pool에 넣지 않고 host 별 대기열에 두었다가
+    같은 host의 import가 끝나면 넣는다. (대기 중인 job이 worker를 차지하지 않음)
+    index 생성은 별도 executor(index_workers)에서 실행되어
+    다른 collection의 import를 막지 않는다.
+
+    Args:
+        max_workers (int): 동시에 실행할 최대 import 수
+        max_per_host (int): RDB host 당 동시에 실행할 최대 import 수
+        index_workers (int): 동시에 실행할 최대 index 생성 수
+        run_id (str): span log에 기록할 실행 id (None이면 생성)
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_per_host: int = DEFAULT_MAX_PER_HOST,
+        index_workers: int = DEFAULT_INDEX_WORKERS,
+        run_id: str = None,
+    ):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.max_per_host = max_per_host
+        self.jobs: list[MigrationJob] = []
+
+        self._import_executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="migration-import"
+        )
+        self._index_executor = ThreadPoolExecutor(
+            max_workers=index_workers, thread_name_prefix="migration-index"
+        )
+        # host 별 실행 중인 import 수, pool에 넣지 않고 대기 중인 job
+        self._host_running: dict[str, int] = {}
+        self._host_pending: dict[str, deque[MigrationJob]] = {}
+        self._lock = threading.Lock()
+
+    def _span_context(self, job: MigrationJob):
+        return span_context(run_id=self.run_id, job_id=job.id, collection=job.name)
+
+    def _run_import(self, job: MigrationJob):
+        try:
+            with self._span_context(job):
+                self._import(job)
+        finally:
+            self._release_host(job.host)
+
+    def _release_host(self, host: str):
+        if host is None:
+            return
+        with self._lock:
+            self._host_running[host] -= 1
+            pending = self._host_pending.get(host)
+            if pending:
+                self._host_running[host] += 1
+                self._import_executor.submit(self._run_import, pending.popleft())
+
+    def _import(self, job: MigrationJob):
+        try:
+            job.state = IMPORTING
+            start_time = time.time()
+            job.count = job.import_fn(job._progress)
+            job.import_time = timedelta(seconds=time.time() - start_time)
+        except Exception as e:
+            logger.error(f"Fail: import {job.name}")
+            logger.exception(e)
+            job.state, job.error = FAILED, e
+            return
+
+        if job.index_fn is None:
+            job.state = DONE
+        else:
+            job.state = INDEXING
+            self._index_executor.submit(self._run_index, job)
+
+    def _run_index(self, job: MigrationJob):
+        try:
+            start_time = time.time()
+            with self._span_context(job), StageSpans() as spans:
+                with spans.stage("index"):
+                    job.index_report = job.index_fn() or []
+                spans.stages["index"]["rows"] = len(job.index_report)
+            job.index_time = timedelta(seconds=time.time() - start_time)
+            job.state = DONE
+        except Exception as e:
+            logger.error(f"Fail: create index {job.name}")
+            logger.exception(e)
+            job.state, job.error = FAILED, e
+
+    def submit(self, job: MigrationJob):
+        self.jobs.append(job)
+        if job.host is not None:
+            with self._lock:
+                if self._host_running.get(job.host, 0) >= self.max_per_host:
+                    self._host_pending.setdefault(job.host, deque()).append(job)
+                    return
+                self._host_running[job.host] = self._host_running.get(job.host, 0) + 1
+        self._import_executor.submit(self._run_import, job)
+
+    def done(self) -> bool:
+        return all(job.state in (DONE, FAILED) for job in self.jobs)
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        모든 job이 끝날 때까지(또는 timeout 동안) 대기하고 완료 여부를 반환
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while not self.done():
+            if deadline is not None and time.time() >= deadline:
+                break
+            time.sleep(0.1)
+        return self.done()
+
+    def status(self) -> list[dict]:
+        return [job.to_dict() for job in self.jobs]
+
+    def index_report(self) -> list[dict]:
+        return [report for job in self.jobs for report in job.index_report]
+
+    def shutdown(self):
+        self._import_executor.shutdown(wait=True)
+        self._index_executor.shutdown(wait=True)
@@ -0,0 +1,88 @@
+import logging
+import threading
+
+from sqlalchemy import URL, create_engine
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DRIVER = "mariadb"
+# host 당 동시 import 수(DEFAULT_MAX_PER_HOST)보다 여유있게 유지
+DEFAULT_RDB_POOL_SIZE = 4
+DEFAULT_RDB_MAX_OVERFLOW = 4
+# 서버 쪽 wait_timeout 으로 끊긴 connection을 쓰지 않도록 주기적으로 재연결(초)
+DEFAULT_RDB_POOL_RECYCLE = 1800
+
+
+def rdb_dsn(
+    username: str,
+    password: str,
+    host: str,
+    port: int | str,
+    database: str,
+    driver: str = DEFAULT_DRIVER,
+) -> str:
+    """
+    rdb_* 설정으로 DSN 문자열을 만든다. (password의 특수문자는 escape)
+    """
+    url = URL.create(
+        driver,
+        username=username,
+        password=password,
+        host=host,
+        port=int(port) if port not in (None, "") else None,
+        database=database,
+    )
+    return url.render_as_string(hide_password=False)
+
+
+def create_rdb_engine(
+    dsn: str,
+    pool_size: int = DEFAULT_RDB_POOL_SIZE,
+    max_overflow: int = DEFAULT_RDB_MAX_OVERFLOW,
+    pool_recycle: int = DEFAULT_RDB_POOL_RECYCLE,
+) -> Engine:
+    """
+    connection pool 설정을 적용한 SQLAlchemy engine 생성
+
+    Args:
+        dsn (str): DSN (e.g. mariadb://user:pw@host:3306/db)
+        pool_size (int): 유지할 connection 수
+        max_overflow (int): pool_size 외에 잠시 더 열 수 있는 connection 수
+        pool_recycle (int): connection 재사용 최대 시간(초)
+    """
+    return create_engine(
+        dsn,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_recycle=pool_recycle,
+        # 사용 전 ping으로 끊어진 connection은 새로 연결
+        pool_pre_ping=True,
+    )
+
+
+_engines: dict[str, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(dsn: str) -> Engine:
+    """
+    DSN 별 공유 engine을 반환 (없으면 생성)
+
+    같은 host/db에 대한 query는 warm connection을 재사용하고,
+    서로 다른 DSN은 각자의 pool을 사용하므로 동시에 실행할 수 있다.
+    """
+    with _engines_lock:
+        engine = _engines.get(dsn)
+        if engine is None:
+            engine = create_rdb_engine(dsn)
+            logger.info(f"create rdb engine: {engine.url}")
+            _engines[dsn] = engine
+    return engine
+
+
+def dispose_engines():
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
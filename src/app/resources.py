@@ -0,0 +1,89 @@
+import uuid
+from typing import TYPE_CHECKING
+
+import streamlit as st
+
+from .es_client import ESClient, get_client
+from .jobs import JobRunner, get_job_runner
+from .metrics import MetricsRegistry, registry
+from .spans import setup_span_logging
+from .temp_manager import TempManager, get_temp_manager
+
+# httpx, sqlalchemy는 import 비용이 커서 사용하는 페이지에서 처음 호출할 때 import
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+    from .es_async import AsyncESClient
+
+# cluster 상태 확인 결과 유지 시간(초)
+DEFAULT_ES_CHECK_TTL = 30
+
+
+# 페이지 간 공유되는 Elasticsearch client (rerun 마다 새로 만들지 않음)
+@st.cache_resource
+def init_es_client(es_url: str) -> ESClient:
+    return get_client(es_url)
+
+
+# rerun 마다 cluster에 요청하지 않도록 상태 확인 결과를 잠시 유지
+@st.cache_data(ttl=DEFAULT_ES_CHECK_TTL, show_spinner=False)
+def check_es_url_cached(es_url: str) -> bool:
+    from .es_api import check_es_url
+
+    return check_es_url(es_url)
+
+
+# 동시 요청이 많은 작업용 비동기 client (event loop thread 포함)
+@st.cache_resource
+def init_es_async_client(es_url: str) -> "AsyncESClient":
+    from .es_async import get_async_client
+
+    return get_async_client(es_url)
+
+
+# background 작업의 owner token
+# session_state는 새로고침하면 사라지므로 URL query param에도 두어
+# 같은 browser tab에서만 자신의 작업을 다시 찾도록 함 (다른 사용자의 작업은 보이지 않음)
+def init_job_owner() -> str:
+    owner = (
+        st.session_state.get("job_owner")
+        or st.query_params.get("job_owner")
+        or uuid.uuid4().hex
+    )
+    st.session_state.job_owner = owner
+    if st.query_params.get("job_owner") != owner:
+        st.query_params["job_owner"] = owner
+    return owner
+
+
+# temp 디렉토리 관리 (session 간 공유)
+@st.cache_resource
+def init_temp_manager() -> TempManager:
+    return get_temp_manager()
+
+
+# background 작업 실행기 (rerun, tab 새로고침과 관계없이 작업 유지)
+@st.cache_resource
+def init_job_runner() -> JobRunner:
+    return get_job_runner()
+
+
+# DSN 별 RDB engine (connection pool 공유)
+@st.cache_resource
+def init_rdb_engine(dsn: str) -> "Engine":
+    from .rdb import get_engine
+
+    return get_engine(dsn)
+
+
+# metric을 주기적으로 logs/metrics.prom 파일에 기록
+@st.cache_resource
+def init_metrics() -> MetricsRegistry:
+    registry.start_flush()
+    return registry
+
+
+# migration span log (logs/spans.jsonl) 기록 thread 시작
+@st.cache_resource
+def init_span_logging():
+    return setup_span_logging()
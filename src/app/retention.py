@@ -0,0 +1,249 @@
+import argparse
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Iterator
+
+from .es_api import (
+    get_cluster_snapshot,
+    invalidate_metadata_cache,
+    iter_delete_indices,
+)
+from .es_client import ESClient
+from .es_snapshot import ClusterSnapshot
+from .index_family import DEFAULT_NAMING_PATTERN, NamingRule
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.join(FILE_DIR, "../../")
+POLICY_PATH = os.path.join(BASE_DIR, "resources", "retention_policy.json")
+
+DELETE = "delete"
+KEEP = "keep"
+
+
+class RetentionPolicy:
+    """
+    index 정리 규칙
+
+    index는 naming_pattern 규칙의 suffix(family)가 같은 것끼리 묶고,
+    최신(버전 prefix 내림차순) keep_latest 개는 항상 남긴다. 그 외 index 중
+    max_age_days 보다 오래된 것을 삭제한다. (둘 중 하나만 지정하면 그 규칙만 적용)
+    alias가 있는 index, exclude_patterns를 포함하는 index/alias, 시스템 index(.)는
+    삭제하지 않는다. (보호된 index도 최신 keep_latest 개에는 포함)
+    이름 규칙에 맞지 않는 index는 family를 알 수 없으므로 순위를 매기지 않고 남긴다.
+
+    Args:
+        keep_latest (int): suffix 별로 남길 최신 index 수 (None이면 규칙 없음)
+        max_age_days (float): 이보다 오래된 index 삭제 (None이면 규칙 없음)
+        protect_aliased (bool): alias가 있는 index 보호 여부
+        exclude_patterns (list[str]): 이름 또는 alias에 포함되면 보호할 문자열
+        naming_pattern (str): family를 나누는 이름 규칙 (prefix, suffix group 정규식)
+    """
+
+    def __init__(
+        self,
+        keep_latest: int = None,
+        max_age_days: float = None,
+        protect_aliased: bool = True,
+        exclude_patterns: list[str] = ("dev",),
+        naming_pattern: str = DEFAULT_NAMING_PATTERN,
+    ):
+        self.keep_latest = keep_latest
+        self.max_age_days = max_age_days
+        self.protect_aliased = protect_aliased
+        self.exclude_patterns = [p for p in exclude_patterns if p]
+        self.naming_rule = NamingRule(naming_pattern)
+
+    def __repr__(self):
+        return f"RetentionPolicy({self.to_dict()})"
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RetentionPolicy":
+        return cls(
+            keep_latest=data.get("keep_latest"),
+            max_age_days=data.get("max_age_days"),
+            protect_aliased=data.get("protect_aliased", True),
+            exclude_patterns=data.get("exclude_patterns", ["dev"]),
+            naming_pattern=data.get("naming_pattern", DEFAULT_NAMING_PATTERN),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "keep_latest": self.keep_latest,
+            "max_age_days": self.max_age_days,
+            "protect_aliased": self.protect_aliased,
+            "exclude_patterns": list(self.exclude_patterns),
+            "naming_pattern": self.naming_rule.pattern,
+        }
+
+    def _protected_reason(self, index: str, aliases: list[str]) -> str | None:
+        if index.startswith("."):
+            return "system index"
+        if self.protect_aliased and len(aliases) > 0:
+            return "aliased"
+        for pattern in self.exclude_patterns:
+            if pattern in index or any(pattern in alias for alias in aliases):
+                return f"excluded: {pattern}"
+        return None
+
+
+def load_policy(path: str = POLICY_PATH) -> RetentionPolicy:
+    if not os.path.exists(path):
+        return RetentionPolicy()
+    with open(path, "r", encoding="utf-8") as f:
+        return RetentionPolicy.from_dict(json.load(f))
+
+
+def save_policy(policy: RetentionPolicy, path: str = POLICY_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(policy.to_dict(), f, indent=2, ensure_ascii=False)
+
+
+def load_snapshot(
+    es_url: str | ESClient, policy: RetentionPolicy, refresh: bool = False
+) -> tuple[bool, ClusterSnapshot]:
+    """
+    policy의 이름 규칙으로 나눈 cluster snapshot
+
+    refresh=True면 metadata cache를 비우고 cluster에서 다시 받아온다.
+
+    Returns:
+        tuple[bool, ClusterSnapshot]: 실패한 경우 (False, Response)
+    """
+    if refresh:
+        invalidate_metadata_cache(es_url)
+    return get_cluster_snapshot(es_url, policy.naming_rule)
+
+
+def plan_retention(
+    snapshot: ClusterSnapshot, policy: RetentionPolicy, now: datetime = None
+) -> list[dict]:
+    """
+    snapshot의 모든 index에 정책을 적용한 결과 (dry run, 실제 삭제하지 않음)
+
+    Returns:
+        list[dict]: index 별 {index, suffix, rank, age_days, store_size, aliases,
+            action(delete/keep), reason}
+            이름 규칙에 맞지 않는 index는 suffix, rank가 None (reason: no family)
+    """
+    now = now or datetime.now()
+    # 규칙이 하나도 없으면 아무것도 지우지 않음
+    no_rule = policy.keep_latest is None and policy.max_age_days is None
+
+    families = snapshot.families
+    plan = []
+    for suffix, family in families.families.items():
+        # 규칙에 맞지 않는 index가 다른 family의 순위에 들어가지 않도록 따로 처리
+        ranks = {
+            index: rank
+            for rank, index in enumerate(
+                index for index in family if families.matched(index)
+            )
+        }
+        for index in family:
+            stats = snapshot.stats_of(index)
+            aliases = snapshot.aliases_of(index)
+            age_days = stats.age_days(now)
+
+            action, reason = KEEP, None
+            rank = ranks.get(index)
+            protected = policy._protected_reason(index, aliases)
+            if rank is None:
+                reason = "no family"
+            elif protected is not None:
+                reason = protected
+            elif no_rule:
+                reason = "no rule"
+            elif policy.keep_latest is not None and rank < policy.keep_latest:
+                reason = f"latest {policy.keep_latest}"
+            elif policy.max_age_days is not None and (
+                age_days is None or age_days < policy.max_age_days
+            ):
+                reason = f"younger than {policy.max_age_days} days"
+            else:
+                action = DELETE
+                reason = (
+                    f"older than {policy.max_age_days} days"
+                    if policy.max_age_days is not None
+                    else f"beyond latest {policy.keep_latest}"
+                )
+
+            plan.append(
+                {
+                    "index": index,
+                    "suffix": suffix if rank is not None else None,
+                    "rank": rank,
+                    "age_days": age_days,
+                    "store_size": stats.store_size,
+                    "aliases": aliases,
+                    "action": action,
+                    "reason": reason,
+                }
+            )
+    return plan
+
+
+def delete_targets(plan: list[dict]) -> list[str]:
+    return [row["index"] for row in plan if row["action"] == DELETE]
+
+
+def apply_retention(
+    targets: list[str], es_url: str | ESClient, policy: RetentionPolicy
+) -> Iterator[dict]:
+    """
+    targets(plan의 삭제 대상)를 bulk 삭제하며 index 별 결과를 반환
+
+    plan을 만든 뒤 alias가 추가되는 등 cluster가 바뀌었을 수 있으므로 cache를 비우고
+    받은 snapshot으로 다시 계산해서 여전히 삭제 대상인 index만 삭제한다.
+    """
+    status, snapshot = load_snapshot(es_url, policy, refresh=True)
+    if not status:
+        raise RuntimeError(f"Fail: load cluster snapshot {snapshot}")
+    current = set(delete_targets(plan_retention(snapshot, policy)))
+    skipped = [index for index in targets if index not in current]
+    if skipped:
+        logger.warning(f"apply retention: skip {len(skipped)} indices {skipped}")
+    targets = [index for index in targets if index in current]
+    logger.info(f"apply retention: delete {len(targets)} indices")
+    return iter_delete_indices(targets, es_url)
+
+
+def main():
+    # cron 등에서 사람 없이 실행하기 위한 entry point
+    # e.g. python -m app.retention --es-url http://localhost:9200 --execute
+    parser = argparse.ArgumentParser(description="index retention policy")
+    parser.add_argument("--es-url", required=True)
+    parser.add_argument("--policy", default=POLICY_PATH)
+    parser.add_argument(
+        "--execute", action="store_true", help="지정하지 않으면 dry run"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    policy = load_policy(args.policy)
+    status, snapshot = load_snapshot(args.es_url, policy)
+    if not status:
+        raise SystemExit(f"Fail: load cluster snapshot {snapshot}")
+
+    plan = plan_retention(snapshot, policy)
+    targets = delete_targets(plan)
+    for index in targets:
+        print(f"delete: {index}")
+    if not args.execute:
+        print(f"dry run: {len(targets)} indices")
+        return
+
+    results = list(apply_retention(targets, args.es_url, policy))
+    failed = [r for r in results if not r["acknowledged"]]
+    registry.write()
+    print(f"deleted: {len(results) - len(failed)}, failed: {len(failed)}")
+    if failed:
+        raise SystemExit(json.dumps(failed, ensure_ascii=False, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
-import slack_sdk
-
-
 def send_msg_to_channel(msg, channel, bot_token):
+    # slack_sdk는 메시지를 보낼 때만 import
+    import slack_sdk
+
     client = slack_sdk.WebClient(token=bot_token)
     response = client.chat_postMessage(channel=channel, text=msg)
     return response
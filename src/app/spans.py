@@ -0,0 +1,218 @@
+import contextvars
+import glob
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from typing import Iterable, Iterator
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.join(FILE_DIR, "../../")
+SPAN_LOG_PATH = os.path.join(BASE_DIR, "logs", "spans.jsonl")
+# span log가 바뀌지 않아도 report를 다시 읽는 주기(초)
+DEFAULT_SPAN_REPORT_TTL = 300
+
+OK = "ok"
+ERROR = "error"
+
+# app.log 와 섞이지 않도록 별도 logger 사용 (propagate 하지 않음)
+span_logger = logging.getLogger("simple_tools.spans")
+span_logger.setLevel(logging.INFO)
+span_logger.propagate = False
+
+# 현재 thread(작업)의 span 공통 필드 (run_id, job_id, collection 등)
+_span_context: contextvars.ContextVar[dict] = contextvars.ContextVar(
+    "span_context", default={}
+)
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+class JsonSpanFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(getattr(record, "span", {}), ensure_ascii=False, default=str)
+
+
+def setup_span_logging(path: str = SPAN_LOG_PATH) -> QueueListener:
+    """
+    span logger에 QueueHandler를 달고, 파일 쓰기는 QueueListener thread에서 처리
+
+    import 중인 thread는 queue에 넣기만 하므로 파일 I/O로 막히지 않는다. (한번만 설정)
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return _listener
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_handler = TimedRotatingFileHandler(
+            path, when="midnight", interval=1, backupCount=30, encoding="utf-8"
+        )
+        file_handler.setFormatter(JsonSpanFormatter())
+
+        span_queue = queue.SimpleQueue()
+        span_logger.addHandler(QueueHandler(span_queue))
+        _listener = QueueListener(span_queue, file_handler)
+        _listener.start()
+        return _listener
+
+
+@contextmanager
+def span_context(**fields):
+    """
+    with 블록 안에서 기록되는 span에 fields를 공통으로 추가
+    """
+    token = _span_context.set({**_span_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _span_context.reset(token)
+
+
+class StageSpans:
+    """
+    작업 하나의 stage(fetch, serialize, import, index) 별 누적 시간, row 수, bytes
+
+    chunk 마다 기록하지 않고 stage 별로 합산하여, with 블록이 끝날 때
+    stage 마다 span 하나를 기록한다. 예외로 끝나면 outcome은 error가 된다.
+
+    Args:
+        fields: span에 추가할 필드 (e.g. collection, operation)
+    """
+
+    def __init__(self, **fields):
+        self.fields = fields
+        self.stages: dict[str, dict] = {}
+
+    def __enter__(self) -> "StageSpans":
+        self.started_at = datetime.now()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.emit(ERROR if exc is not None else OK, exc)
+        return False
+
+    def add(self, stage: str, seconds: float, rows: int = 0, bytes: int = 0):
+        totals = self.stages.setdefault(stage, {"rows": 0, "bytes": 0, "duration": 0.0})
+        totals["rows"] += rows
+        totals["bytes"] += bytes
+        totals["duration"] += seconds
+
+    @contextmanager
+    def stage(self, stage: str, rows: int = 0, bytes: int = 0):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start_time, rows, bytes)
+
+    def iter(self, stage: str, batches: Iterable) -> Iterator:
+        """
+        batch를 하나씩 받아오는 시간을 stage로 기록 (RecordBatch면 row 수, bytes 포함)
+        """
+        iterator = iter(batches)
+        while True:
+            start_time = time.perf_counter()
+            try:
+                batch = next(iterator)
+            except BaseException:
+                # 끝났거나 실패한 경우에도 stage가 기록되도록 함
+                self.add(stage, time.perf_counter() - start_time)
+                if isinstance(sys.exc_info()[1], StopIteration):
+                    return
+                raise
+            self.add(
+                stage,
+                time.perf_counter() - start_time,
+                getattr(batch, "num_rows", 0),
+                getattr(batch, "nbytes", 0),
+            )
+            yield batch
+
+    def emit(self, outcome: str = OK, error: Exception = None):
+        context = _span_context.get()
+        for stage, totals in self.stages.items():
+            span = {
+                "ts": self.started_at.isoformat(sep=" ", timespec="seconds"),
+                # scheduler의 context(job 이름 등)가 함수 안의 필드보다 우선
+                **self.fields,
+                **context,
+                "stage": stage,
+                "rows": totals["rows"],
+                "bytes": totals["bytes"],
+                "duration": round(totals["duration"], 6),
+                "outcome": outcome,
+                "error": None if error is None else str(error),
+            }
+            span_logger.info(stage, extra={"span": span})
+
+
+def span_log_version(path: str = SPAN_LOG_PATH) -> tuple:
+    """
+    span log 파일(rotate된 파일 포함) 별 (경로, 수정 시각, 크기)
+
+    파일을 읽지 않고 span log가 바뀌었는지 확인하는 용도 (cache key)
+    """
+    version = []
+    for file_path in sorted(glob.glob(path + "*")):
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            continue
+        version.append((file_path, stat.st_mtime_ns, stat.st_size))
+    return tuple(version)
+
+
+def read_spans(path: str = SPAN_LOG_PATH) -> list[dict]:
+    """
+    span log 파일(rotate된 파일 포함)의 모든 span (오래된 순)
+    """
+    spans = []
+    for file_path in sorted(glob.glob(path + "*")):
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    spans.sort(key=lambda span: span.get("ts", ""))
+    return spans
+
+
+def throughput_report(spans: list[dict]) -> list[dict]:
+    """
+    run, collection, stage 별 처리량 요약 (rows/s, mb/s)
+    """
+    report = {}
+    for span in spans:
+        key = (span.get("run_id"), span.get("collection"), span["stage"])
+        row = report.setdefault(
+            key,
+            {
+                "ts": span.get("ts"),
+                "run_id": key[0],
+                "collection": key[1],
+                "stage": key[2],
+                "rows": 0,
+                "bytes": 0,
+                "duration": 0.0,
+                "outcome": OK,
+            },
+        )
+        row["rows"] += span.get("rows", 0)
+        row["bytes"] += span.get("bytes", 0)
+        row["duration"] += span.get("duration", 0.0)
+        if span.get("outcome") != OK:
+            row["outcome"] = span.get("outcome")
+
+    for row in report.values():
+        duration = row["duration"]
+        row["rows_per_sec"] = row["rows"] / duration if duration > 0 else None
+        row["mb_per_sec"] = row["bytes"] / 1024**2 / duration if duration > 0 else None
+    return list(report.values())
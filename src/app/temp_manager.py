@@ -0,0 +1,179 @@
+import gzip
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.join(FILE_DIR, "../../")
+TEMP_DIR = os.path.join(BASE_DIR, "temp")
+
+DEFAULT_MAX_BYTES = 20 * 1024**3
+DEFAULT_MAX_AGE = 24 * 60 * 60
+# eviction을 다시 수행하기 전 최소 간격(초)
+EVICT_INTERVAL = 60
+
+COMPRESSION_SUFFIX = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def open_artifact(path: str, mode: str = "rb"):
+    """
+    확장자(.gz, .zst)에 따라 압축/해제하며 스트리밍으로 읽고 쓰는 file object
+
+    mode는 open()과 같다. (text mode인 경우 utf-8)
+    """
+    encoding = None if "b" in mode else "utf-8"
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, encoding=encoding)
+    if path.endswith(".zst"):
+        import zstandard
+
+        return zstandard.open(path, mode, encoding=encoding)
+    return open(path, mode, encoding=encoding)
+
+
+class TempManager:
+    """
+    temp 디렉토리의 임시 파일(업로드, 변환 파일) 관리
+
+    job(session) 별 하위 디렉토리와 고유한 파일 이름을 만들어 동시에 실행되는
+    작업끼리 파일을 덮어쓰지 않게 하고, 오래된 파일과 용량 초과분을 지운다.
+
+    Args:
+        temp_dir (str): temp 디렉토리 경로
+        max_bytes (int): temp 디렉토리 최대 사용량 (초과 시 오래된 파일부터 삭제)
+        max_age (float): 파일 보관 기간(초)
+    """
+
+    def __init__(
+        self,
+        temp_dir: str = TEMP_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = DEFAULT_MAX_AGE,
+    ):
+        self.temp_dir = temp_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._last_evict = 0.0
+        self._lock = threading.Lock()
+
+    def job_dir(self, job_id: str = None) -> str:
+        path = self.temp_dir if job_id is None else os.path.join(self.temp_dir, job_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def new_path(
+        self,
+        name: str,
+        job_id: str = None,
+        compression: str = None,
+        unique: bool = True,
+    ) -> str:
+        """
+        임시 파일 경로를 만들어 반환
+
+        Args:
+            name (str): 파일 이름
+            job_id (str): job(session) id, 있으면 해당 하위 디렉토리 사용
+            compression (str): None, "gzip", "zstd"
+            unique (bool): 파일 이름 앞에 고유 id를 붙일지 여부
+        """
+        if unique:
+            name = f"{uuid.uuid4().hex[:12]}_{name}"
+        return os.path.join(
+            self.job_dir(job_id), name + COMPRESSION_SUFFIX[compression]
+        )
+
+    def find(self, name: str, job_id: str = None) -> str:
+        """
+        name으로 저장된 파일(압축 포함)의 경로를 반환. job 디렉토리에 없으면 temp 디렉토리에서 찾음
+        """
+        dirs = (
+            [self.temp_dir] if job_id is None else [self.job_dir(job_id), self.temp_dir]
+        )
+        for directory in dirs:
+            for suffix in COMPRESSION_SUFFIX.values():
+                path = os.path.join(directory, name + suffix)
+                if os.path.exists(path):
+                    return path
+        return os.path.join(dirs[0], name)
+
+    def files(self) -> list[tuple[str, int, float]]:
+        """
+        temp 디렉토리의 (경로, 크기, 수정 시각) 목록 (오래된 순)
+        """
+        files = []
+        for root, _, file_names in os.walk(self.temp_dir):
+            for file_name in file_names:
+                if file_name == ".gitkeep":
+                    continue
+                path = os.path.join(root, file_name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((path, stat.st_size, stat.st_mtime))
+        files.sort(key=lambda file: file[2])
+        return files
+
+    def usage(self) -> int:
+        return sum(size for _, size, _ in self.files())
+
+    def evict(self, protect: tuple[str] = (), force: bool = False) -> list[str]:
+        """
+        max_age 보다 오래된 파일을 지우고, 그래도 max_bytes를 넘으면 오래된 파일부터 삭제
+
+        Args:
+            protect (tuple[str]): 지우지 않을 job id 목록 (현재 session 등)
+            force (bool): EVICT_INTERVAL 이내에 다시 호출되어도 수행
+
+        Returns:
+            list[str]: 삭제된 파일 경로
+        """
+        with self._lock:
+            if not force and time.time() - self._last_evict < EVICT_INTERVAL:
+                return []
+            self._last_evict = time.time()
+
+        protected = [os.path.join(self.temp_dir, job_id) + os.sep for job_id in protect]
+        files = self.files()
+        usage = sum(size for _, size, _ in files)
+        now = time.time()
+        removed = []
+        for path, size, mtime in files:
+            if any(path.startswith(p) for p in protected):
+                continue
+            if now - mtime < self.max_age and usage <= self.max_bytes:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            usage -= size
+            removed.append(path)
+
+        self._remove_empty_dirs(protect)
+        if removed:
+            logger.info(f"evict temp files: {len(removed)}")
+        return removed
+
+    def _remove_empty_dirs(self, protect: tuple[str] = ()):
+        for entry in os.scandir(self.temp_dir):
+            if entry.name in protect:
+                continue
+            if entry.is_dir() and not os.listdir(entry.path):
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+
+_temp_manager = None
+
+
+def get_temp_manager() -> TempManager:
+    global _temp_manager
+    if _temp_manager is None:
+        _temp_manager = TempManager()
+    return _temp_manager
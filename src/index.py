@@ -2,7 +2,7 @@ import streamlit as st
 import os
 import logging
 from logging.handlers import TimedRotatingFileHandler
-from app.es_api import check_es_url
+from app.resources import check_es_url_cached, init_metrics, init_span_logging
 
 
 BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.path.pardir)
@@ -47,6 +47,10 @@ st.session_state.logging = True
 logger = logging.getLogger(__name__)
 logger.addHandler(handler)
 
+# es_api, db_api 호출 metric, migration span 기록 시작
+init_metrics()
+init_span_logging()
+
 es_url_file_path = os.path.join(resources_path, "ES_URL.txt")
 
 ui_setup_url = st.empty()
@@ -71,7 +75,7 @@ else:
         es_url = f.read().strip()
         logger.info(f"ES URL conf file exists: {es_url}")
 # ES_URL 변수에 값 저장
-if es_url and check_es_url(es_url):  # "ES_URL.txt" 파일 생성 및 URL 값 저장
+if es_url and check_es_url_cached(es_url):  # "ES_URL.txt" 파일 생성 및 URL 값 저장
     ui_setup_url.empty()  # setup_url ui 가리기
 
     with open(es_url_file_path, "w") as f:
@@ -99,6 +103,8 @@ if es_url and check_es_url(es_url):  # "ES_URL.txt" 파일 생성 및 URL 값 
             icon="🗄️",
         )
 else:
+    # 실패한 결과는 유지하지 않음 (cluster가 복구되면 바로 다시 연결)
+    check_es_url_cached.clear()
     if os.path.exists(es_url_file_path):
         os.remove(es_url_file_path)
     st.rerun()
@@ -1,14 +1,22 @@
 import streamlit as st
 import pandas as pd
 import logging
+import re
 from app.es_api import (
+    get_metadata_cache_stats,
+    invalidate_metadata_cache,
     get_aliases_via_index_name,
     change_aliases_old_to_new,
+    change_aliases_bulk,
     get_all_indices,
     get_all_aliases,
     get_indices_wo_alias_except_dev,
-    get_indices_via_phrase,
+    get_cluster_snapshot,
 )
+from app.index_family import DEFAULT_NAMING_PATTERN, NamingRule
+from app.index_search import IndexSearch, page_count, paginate
+from app.jobs import DEFAULT_POLL_INTERVAL, FAILED
+from app.resources import init_es_client, init_job_owner, init_job_runner
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +31,32 @@ st.set_page_config(
 
 # ES URL 설정
 ES_URL = st.session_state["ES_URL"]
+es_client = init_es_client(ES_URL)
+job_runner = init_job_runner()
+job_owner = init_job_owner()
+
+with st.sidebar:
+    cache_stats = get_metadata_cache_stats(es_client)
+    st.caption(
+        f"metadata cache hit/miss: {cache_stats['hits']}/{cache_stats['misses']}"
+    )
+    # 유사 index(family)를 나누는 이름 규칙 (prefix, suffix group을 가진 정규식)
+    naming_pattern = st.text_input(
+        "index naming rule",
+        value=st.session_state.get("naming_pattern", DEFAULT_NAMING_PATTERN),
+    )
+    try:
+        naming_rule = NamingRule(naming_pattern)
+        st.session_state.naming_pattern = naming_pattern
+    except (re.error, ValueError) as e:
+        st.error(f"invalid naming rule: {e}")
+        naming_rule = NamingRule()
+
+# cluster 상태(alias, index family)를 한번에 받아옴
+status, snapshot = get_cluster_snapshot(es_client, naming_rule)
+if not status:
+    st.error("Fail: load cluster snapshot")
+    st.stop()
 
 selected_aliases = []
 
@@ -32,7 +66,7 @@ ui_tab_alias, ui_tab_index, ui_tab_multi = st.tabs(["via Alias", "via Index", "m
 with ui_tab_alias:
     # Elastic cluster에서 alias list 받아오기
     # logger.info("load alias list")
-    status, aliases = get_all_aliases(ES_URL)
+    status, aliases = get_all_aliases(es_client)
     alias_list = aliases.keys()
     # logger.info("complete loading alias list")
     ui_col_left, ui_col_right = st.columns(2)
@@ -64,12 +98,18 @@ with ui_tab_alias:
         # logger.info(f"selected prev index: {prev_index_name}")
 
         if prev_index_name is not None:
-            _, target_index_list = get_indices_via_phrase(
-                "*" + "_".join(prev_index_name.split("_")[1:]), ES_URL
-            )
+            # 같은 family(suffix)의 index를 snapshot에서 바로 조회 (최신 버전 순)
+            target_index_list = snapshot.siblings(prev_index_name)
 
             new_index_name = st.selectbox(
-                "new index name", target_index_list, placeholder="Select index name..."
+                "new index name",
+                target_index_list,
+                index=(
+                    target_index_list.index(snapshot.latest_sibling(prev_index_name))
+                    if len(target_index_list) > 0
+                    else None
+                ),
+                placeholder="Select index name...",
             )
             # logger.info(f"selected new index: {new_index_name}")
 
@@ -84,7 +124,7 @@ with ui_tab_alias:
                     prev_index_name,
                     new_index_name,
                     [alias_name],
-                    ES_URL,
+                    es_client,
                 )
 
                 st.text(result)
@@ -94,7 +134,7 @@ with ui_tab_alias:
 
 with ui_tab_index:
     # Elastic cluster에서 index list 받아오기
-    status, index_list = get_all_indices(ES_URL)
+    status, index_list = get_all_indices(es_client)
 
     ui_col_left, ui_col_right = st.columns(2)
     # 좌측 컬럼 UI
@@ -111,7 +151,7 @@ with ui_tab_index:
         # old_index 선택했을 때만 출력
         if prev_index_name is not None:
             result, resp = get_aliases_via_index_name(
-                index_name=prev_index_name, es_url=ES_URL
+                index_name=prev_index_name, es_url=es_client
             )
 
             # 성공적으로 alias를 받았을 경우(alias가 0 건인 경우도 포함)
@@ -159,7 +199,7 @@ with ui_tab_index:
                     prev_index_name,
                     new_index_name,
                     selected_aliases,
-                    ES_URL,
+                    es_client,
                 )
 
                 st.text(result)
@@ -169,17 +209,64 @@ with ui_tab_index:
 
 
 def reload_index_list():
-    if "data_df" in st.session_state:
-        st.session_state.pop("data_df")
-    status, indices = get_indices_wo_alias_except_dev(ES_URL)
+    if "index_search" in st.session_state:
+        st.session_state.pop("index_search")
+    status, indices = get_indices_wo_alias_except_dev(es_client)
     if status:
-        st.session_state.data_df = pd.DataFrame(
-            [(a, False) for a in indices], columns=["index", "select"]
-        )
+        # 검색용 token index는 목록을 받아올 때 한번만 생성
+        st.session_state.index_search = IndexSearch(indices)
+        # index -> alias를 가져올 index (page를 넘겨도 선택 유지)
+        st.session_state.alias_changes = {}
     else:
         st.error("Fail")
 
 
+# dev only인 경우 dev alias만 변경
+def alias_filter(aliases, dev_only):
+    if dev_only:
+        return [alias for alias in aliases if "dev" in alias]
+    return aliases
+
+
+# background job: alias 변경 결과(전체 성공 여부, alias 별 결과)를 반환
+def change_aliases_job(job, switches, es_url):
+    job.update(message=f"{len(switches)} switches")
+    return change_aliases_bulk(switches, es_url)
+
+
+# 실행 중에는 진행 상황만 주기적으로 다시 그림 (페이지 전체는 rerun 하지 않음)
+@st.experimental_fragment(run_every=DEFAULT_POLL_INTERVAL)
+def poll_alias_job(job_id):
+    job = job_runner.get(job_id)
+    if job is None or job.finished:
+        # 끝나면 페이지 전체를 한번 rerun하여 결과 표시
+        st.rerun()
+    st.info(f"{job.title} (job: {job.id}) {job.message}")
+
+
+def watch_alias_job():
+    job = job_runner.get(st.session_state.get("alias_job_id"))
+    if job is None:
+        return
+    if not job.finished:
+        poll_alias_job(job.id)
+        return
+
+    if job.state == FAILED:
+        st.error(f"Error: {job.error}")
+        return
+    result, results = job.result
+    st.text(result)
+    st.dataframe(pd.DataFrame(results), hide_index=True)
+
+
+# 새로고침 등으로 session이 바뀐 경우 이 tab의 마지막 alias 변경 작업을 다시 표시
+if "alias_job_id" not in st.session_state:
+    last_job = job_runner.latest("change_aliases", job_owner)
+    if last_job is not None:
+        st.session_state.alias_job_id = last_job.id
+
+
 with ui_tab_multi:
     # TODO
     # 1. alias 지정안된 인덱스 리스트 보여주기
@@ -187,12 +274,13 @@ with ui_tab_multi:
     ui_col_left, ui_col_right = st.columns(2)
     index_list = []
 
-    if "data_df" not in st.session_state:
+    if "index_search" not in st.session_state:
         reload_index_list()
 
     with ui_col_left:
         st.subheader("List of index(with no alias)")
         if st.button("Reload list of index", type="primary"):
+            invalidate_metadata_cache(es_client)
             reload_index_list()
 
     ui_col_left_search, ui_col_right_btn1, ui_col_right_btn2 = st.columns([4, 1, 1])
@@ -200,10 +288,7 @@ with ui_tab_multi:
     with ui_col_left_search:
         search_words = st.text_input(label="search", placeholder="e.g. locale")
         search_words = search_words.strip().split(" ")
-        search_df = st.session_state.data_df
-
-        for word in search_words:
-            search_df = search_df[search_df["index"].str.contains(word, na=False)]
+        search_indices = st.session_state.index_search.search(search_words)
         # st.code(search_words)
 
     with ui_col_right_btn2:
@@ -212,62 +297,105 @@ with ui_tab_multi:
         if st.button(label="Change All Aliases", type="primary"):
             # 변경할 alias가 선택된 경우만 실행
             if len(st.session_state.df_list) > 0:
+                switches = []
                 for new_index, prev_index, aliases in st.session_state.df_list:
                     logger.info(
                         f"{aliases} change - from: {prev_index} ->  to: {new_index}"
                     )
-                    result, resp = change_aliases_old_to_new(
-                        prev_index,
-                        new_index,
-                        aliases,
-                        ES_URL,
-                    )
-
-                    st.text(result)
-                    st.json(resp.text)
+                    switches.append((prev_index, new_index, aliases))
+
+                st.session_state.alias_job_id = job_runner.submit(
+                    "change_aliases",
+                    f"change aliases of {len(switches)} indices",
+                    change_aliases_job,
+                    switches,
+                    es_client,
+                    owner=job_owner,
+                )
             else:
                 st.error("검색을 통해 선택하여 변경할 index를 정해주세요.")
 
+    ui_alias_job = st.container()
+
+    ui_col_page_size, ui_col_page, ui_col_total = st.columns([1, 1, 4])
+    with ui_col_page_size:
+        page_size = st.selectbox("page size", [20, 50, 100], index=0)
+    with ui_col_page:
+        total_pages = page_count(len(search_indices), page_size)
+        page = st.number_input(
+            "page", min_value=1, max_value=total_pages, value=1, step=1
+        )
+    with ui_col_total:
+        st.caption(
+            f"{len(search_indices)} / {len(st.session_state.index_search)} indices,"
+            f" page {page}/{total_pages}"
+        )
+    page_indices = paginate(search_indices, page, page_size)
+
     if search_words != [""]:
-        st.session_state.df_list = []
-        for i, row in search_df.iterrows():
+        alias_changes = st.session_state.alias_changes
+        # 현재 page의 index만 그림 (다른 page의 선택은 alias_changes에 유지)
+        for index in page_indices:
             st.divider()
             ui_col_left_2, ui_col_right_1, ui_col_right_2 = st.columns([1, 1, 1])
             with ui_col_left_2:
-                st.selectbox("index", [row["index"]], disabled=True)
+                st.selectbox("index", [index], disabled=True)
 
             with ui_col_right_1:
 
-                _, target_index_list = get_indices_via_phrase(
-                    "*" + "_".join(row["index"].split("_")[1:]), ES_URL
-                )
-                target_index_list.remove(row["index"])
+                target_index_list = snapshot.siblings(index, include_self=False)
                 target_index_list.insert(0, None)
+                selected = alias_changes.get(index)
                 change_index_name = st.selectbox(
-                    f"change for {row['index']}",
+                    f"change for {index}",
                     target_index_list,
+                    index=(
+                        target_index_list.index(selected)
+                        if selected in target_index_list
+                        else 0
+                    ),
                     placeholder="Select index name...",
                 )
+                if change_index_name is None:
+                    alias_changes.pop(index, None)
+                else:
+                    alias_changes[index] = change_index_name
 
             with ui_col_right_2:
                 if change_index_name is not None:
-                    result, resp = get_aliases_via_index_name(
-                        index_name=change_index_name, es_url=ES_URL
-                    )
-
                     # 성공적으로 alias를 받았을 경우(alias가 0 건인 경우도 포함)
-                    if result:
-                        if st.session_state.dev_only:
-                            for e in resp.copy():
-                                if "dev" not in e:
-                                    resp.remove(e)
-
+                    if change_index_name in snapshot:
                         st.text("alias")
-                        st.table(resp)
+                        st.table(
+                            alias_filter(
+                                snapshot.aliases_of(change_index_name),
+                                st.session_state.dev_only,
+                            )
+                        )
 
-            if change_index_name is not None:
-                st.session_state.df_list.append([row["index"], change_index_name, resp])
+        # 검색 결과 중 변경할 index가 선택된 것만 대상
+        st.session_state.df_list = [
+            [
+                index,
+                alias_changes[index],
+                alias_filter(
+                    snapshot.aliases_of(alias_changes[index]),
+                    st.session_state.dev_only,
+                ),
+            ]
+            for index in search_indices
+            if index in alias_changes
+        ]
     else:
         st.session_state.df_list = []
-        st.table(search_df["index"])
+        st.dataframe(
+            pd.DataFrame(page_indices, columns=["index"]),
+            hide_index=True,
+            use_container_width=True,
+        )
     # st.code(st.session_state.df_list)
+
+
+# alias 변경 작업 결과는 페이지를 모두 그린 후 표시
+with ui_alias_job:
+    watch_alias_job()
@@ -1,9 +1,28 @@
 import streamlit as st
 import pandas as pd
 import logging
+import re
+from datetime import datetime
 from app.es_api import (
-    get_indices_wo_alias,
-    delete_indices,
+    get_metadata_cache_stats,
+    invalidate_metadata_cache,
+    get_cluster_snapshot,
+    iter_delete_indices,
+)
+from app.es_snapshot import format_bytes
+from app.index_family import DEFAULT_NAMING_PATTERN, NamingRule
+from app.index_search import IndexSearch, page_count, paginate
+from app.jobs import DEFAULT_POLL_INTERVAL, FAILED
+from app.resources import init_es_client, init_job_owner, init_job_runner
+from app.retention import (
+    DELETE,
+    RetentionPolicy,
+    apply_retention,
+    delete_targets,
+    load_policy,
+    load_snapshot,
+    plan_retention,
+    save_policy,
 )
 
 st.set_page_config(
@@ -20,108 +39,349 @@ if "ES_URL" not in st.session_state:
 
 # ES URL 설정
 ES_URL = st.session_state["ES_URL"]
+es_client = init_es_client(ES_URL)
+job_runner = init_job_runner()
+job_owner = init_job_owner()
+
+with st.sidebar:
+    cache_stats = get_metadata_cache_stats(es_client)
+    st.caption(
+        f"metadata cache hit/miss: {cache_stats['hits']}/{cache_stats['misses']}"
+    )
 
 
 def reload_index_list():
-    if "data_df" in st.session_state:
-        st.session_state.pop("data_df")
-    status, indices = get_indices_wo_alias(ES_URL)
+    if "index_search" in st.session_state:
+        st.session_state.pop("index_search")
+    # alias 정보와 index 통계(크기, 문서 수, 생성일)를 요청 한번씩으로 받아옴
+    status, snapshot = get_cluster_snapshot(es_client)
     if status:
-        st.session_state.data_df = pd.DataFrame(
-            [(a, False) for a in indices], columns=["index", "select"]
-        )
+        indices = snapshot.unaliased()
+        # 검색용 token index는 목록을 받아올 때 한번만 생성
+        st.session_state.index_search = IndexSearch(indices)
+        st.session_state.index_stats = {
+            index: snapshot.stats_of(index) for index in indices
+        }
+        st.session_state.selected_indices = set()
     else:
         st.error("Fail")
 
 
+# 정렬 기준: (IndexStats -> 정렬 값, 내림차순 여부), None이면 이름 오름차순 유지
+SORT_KEYS = {
+    "index name": (None, False),
+    "size (largest first)": (lambda stats: stats.store_size or 0, True),
+    "age (oldest first)": (
+        lambda stats: stats.creation_date or datetime.max,
+        False,
+    ),
+    "docs (most first)": (lambda stats: stats.docs_count or 0, True),
+}
+
+
+def filter_indices(indices, index_stats, min_size, min_age_days):
+    if min_size <= 0 and min_age_days <= 0:
+        return indices
+    now = datetime.now()
+    filtered = []
+    for index in indices:
+        stats = index_stats[index]
+        if min_size > 0 and (stats.store_size or 0) < min_size:
+            continue
+        if min_age_days > 0 and (stats.age_days(now) or 0) < min_age_days:
+            continue
+        filtered.append(index)
+    return filtered
+
+
+def stats_dataframe(indices, index_stats):
+    now = datetime.now()
+    return pd.DataFrame(
+        [
+            (
+                index,
+                index_stats[index].docs_count,
+                format_bytes(index_stats[index].store_size),
+                index_stats[index].creation_date,
+                index_stats[index].age_days(now),
+                index_stats[index].health,
+            )
+            for index in indices
+        ],
+        columns=["index", "docs", "size", "created", "age_days", "health"],
+    )
+
+
+# background job: index를 삭제하며 진행 상황을 남기고 실패 목록을 반환
+# policy가 있으면 삭제 직전에 cluster 상태로 다시 계산해서 여전히 삭제 대상인 index만 삭제
+def delete_indices_job(job, indices, es_url, policy=None):
+    if policy is None:
+        results = iter_delete_indices(indices, es_url)
+    else:
+        results = apply_retention(indices, es_url, policy)
+    fail_list = []
+    for done, result in enumerate(results, start=1):
+        if not result["acknowledged"]:
+            fail_list.append(result)
+        job.update(done / len(indices), f"{done}/{len(indices)} {result['index']}")
+    return fail_list
+
+
 @st.experimental_dialog("Delete Index")
-def confirm_delete(selected_indices, es_url):
+def confirm_delete(selected_indices, es_url, policy=None):
     st.warning(
         "Please double-check the selected index in the right table. Once deleted, it cannot be restored."
     )
     st.write(selected_indices)
     if st.button("confirm"):
         logger.info(f"delete index:{selected_indices}")
-        status, resp_list = delete_indices(selected_indices, es_url)
-        if status:
-            logger.info("Success: delete index")
-            st.success("Success")
-            reload_index_list()
-            st.rerun()
-        else:
-            st.error("Error")
-            st.json(resp_list)
-            logger.error(resp_list)
+        st.session_state.delete_job_id = job_runner.submit(
+            "delete_indices",
+            f"delete {len(selected_indices)} indices",
+            delete_indices_job,
+            selected_indices,
+            es_url,
+            policy,
+            owner=job_owner,
+        )
+        st.rerun()
+
+
+# 실행 중에는 진행 상황만 주기적으로 다시 그림 (페이지 전체는 rerun 하지 않음)
+@st.experimental_fragment(run_every=DEFAULT_POLL_INTERVAL)
+def poll_delete_job(job_id):
+    job = job_runner.get(job_id)
+    if job is None or job.finished:
+        # 끝나면 페이지 전체를 한번 rerun하여 결과 표시, index 목록 갱신
+        st.rerun()
+    st.progress(job.progress, text=f"{job.title}: {job.message}")
+
+
+def watch_delete_job():
+    job = job_runner.get(st.session_state.get("delete_job_id"))
+    if job is None:
+        return
+    if not job.finished:
+        poll_delete_job(job.id)
+        return
+
+    if job.state == FAILED:
+        st.error(f"Error: {job.error}")
+    elif len(job.result) > 0:
+        st.error("Error")
+        st.json(job.result)
+        logger.error(job.result)
+    else:
+        logger.info("Success: delete index")
+        st.success(f"Success: {job.title}")
+
+    # 삭제가 끝난 후 한번만 index 목록을 갱신
+    if st.session_state.get("delete_job_reloaded") != job.id:
+        st.session_state.delete_job_reloaded = job.id
+        reload_index_list()
+        st.rerun()
+
 
+# 새로고침 등으로 session이 바뀐 경우 이 tab의 마지막 삭제 작업을 다시 표시
+if "delete_job_id" not in st.session_state:
+    last_job = job_runner.latest("delete_indices", job_owner)
+    if last_job is not None:
+        st.session_state.delete_job_id = last_job.id
+        # 이미 끝난 작업이면 새 session에서 목록을 읽으므로 다시 갱신하지 않음
+        if last_job.finished:
+            st.session_state.delete_job_reloaded = last_job.id
 
 selected_aliases = []
 
-ui_tab_index, ui_tab_dummy = st.tabs(["Index with no alias", "dummy"])
+ui_tab_index, ui_tab_retention = st.tabs(["Index with no alias", "Retention"])
 with ui_tab_index:
     ui_col_left, ui_col_right = st.columns(2)
     index_list = []
 
-    if "data_df" not in st.session_state:
+    if "index_search" not in st.session_state:
         reload_index_list()
 
     with ui_col_left:
         st.subheader("List of index(with no alias)")
         if st.button("Reload list of index", type="primary"):
+            invalidate_metadata_cache(es_client)
             reload_index_list()
+        ui_delete_job = st.container()
 
         ui_col_left_btn, ui_col_right_btn1, ui_col_right_btn2 = st.columns([4, 1, 1])
 
         with ui_col_left_btn:
             search_words = st.text_input(label="search", placeholder="e.g. locale")
-            search_words = search_words.strip().split(" ")
-            search_df = st.session_state.data_df
-            for word in search_words:
-                search_df = search_df[search_df["index"].str.contains(word, na=False)]
+            search_indices = st.session_state.index_search.search(
+                search_words.strip().split(" ")
+            )
+
+        # 크기/생성일 기준 필터, 정렬 (예: 큰 index, 오래된 index 먼저)
+        index_stats = st.session_state.index_stats
+        ui_col_sort, ui_col_min_size, ui_col_min_age = st.columns([2, 1, 1])
+        with ui_col_sort:
+            sort_by = st.selectbox("sort by", list(SORT_KEYS.keys()))
+        with ui_col_min_size:
+            min_size_mb = st.number_input("min size (mb)", min_value=0, value=0)
+        with ui_col_min_age:
+            min_age_days = st.number_input("min age (days)", min_value=0, value=0)
+        search_indices = filter_indices(
+            search_indices, index_stats, min_size_mb * 1024**2, min_age_days
+        )
+        sort_key, reverse = SORT_KEYS[sort_by]
+        if sort_key is not None:
+            search_indices = sorted(
+                search_indices,
+                key=lambda index: sort_key(index_stats[index]),
+                reverse=reverse,
+            )
 
         with ui_col_right_btn1:
             if st.button("Check All"):
-                st.session_state.data_df["select"] = True
+                st.session_state.selected_indices |= set(search_indices)
                 st.rerun()
         with ui_col_right_btn2:
             if st.button("Uncheck All"):
-                st.session_state.data_df["select"] = False
+                st.session_state.selected_indices -= set(search_indices)
                 st.rerun()
 
+        # 현재 page의 index만 data_editor로 그림
+        ui_col_page_size, ui_col_page, ui_col_total = st.columns([1, 1, 2])
+        with ui_col_page_size:
+            page_size = st.selectbox("page size", [50, 100, 500], index=1)
+        with ui_col_page:
+            total_pages = page_count(len(search_indices), page_size)
+            page = st.number_input(
+                "page", min_value=1, max_value=total_pages, value=1, step=1
+            )
+        with ui_col_total:
+            st.caption(
+                f"{len(search_indices)} / {len(st.session_state.index_search)} indices,"
+                f" page {page}/{total_pages}"
+            )
+
+        page_indices = paginate(search_indices, page, page_size)
+        page_df = stats_dataframe(page_indices, index_stats)
+        page_df["select"] = [
+            index in st.session_state.selected_indices for index in page_indices
+        ]
         stdf = st.data_editor(
-            search_df,
+            page_df,
             column_config={
                 "index": st.column_config.TextColumn(width="large"),
+                "docs": st.column_config.NumberColumn(format="%d"),
+                "age_days": st.column_config.NumberColumn("age (days)", format="%.1f"),
                 "select": st.column_config.CheckboxColumn("select", width="small"),
             },
-            disabled=["index"],
+            disabled=["index", "docs", "size", "created", "age_days", "health"],
             hide_index=True,
             use_container_width=True,
-            key="stdf",
+            key=f"stdf_{search_words}_{page}_{page_size}",
         )
+        for index, select in zip(stdf["index"], stdf["select"]):
+            if select:
+                st.session_state.selected_indices.add(index)
+            else:
+                st.session_state.selected_indices.discard(index)
+
+        # 검색 결과에 보이는 index만 삭제 대상
+        selected_indices = [
+            index
+            for index in search_indices
+            if index in st.session_state.selected_indices
+        ]
 
         if st.button("Delete Indices", type="primary"):
             st.warning(
                 "Please double-check the selected index in the right table. Once deleted, it cannot be restored."
             )
-            selected_indices = stdf[stdf["select"]]["index"].tolist()
 
-            confirm_delete(selected_indices, ES_URL)
+            confirm_delete(selected_indices, es_client)
 
     with ui_col_right:
         st.subheader("Selcted index")
-        # st.table(stdf)
-        st.table(stdf[stdf["select"]]["index"])
-
+        selected_size = sum(
+            index_stats[index].store_size or 0 for index in selected_indices
+        )
+        st.caption(
+            f"{len(selected_indices)} indices, {format_bytes(selected_size)} to free"
+        )
+        st.dataframe(
+            stats_dataframe(selected_indices, index_stats),
+            hide_index=True,
+            use_container_width=True,
+        )
 
-# dummy UI
-with ui_tab_dummy:
-    st.write("dummy")
 
-    ui_col_left, ui_col_right = st.columns(2)
-    # 좌측 컬럼 UI
+# 정책 기반 index 정리 UI
+with ui_tab_retention:
+    policy = load_policy()
+    ui_col_left, ui_col_right = st.columns([1, 2])
     with ui_col_left:
-        st.write("left column")
+        st.subheader("Retention policy")
+        keep_latest = st.number_input(
+            "keep latest N per suffix (0: no rule)",
+            min_value=0,
+            value=policy.keep_latest or 0,
+        )
+        max_age_days = st.number_input(
+            "delete older than X days (0: no rule)",
+            min_value=0,
+            value=int(policy.max_age_days or 0),
+        )
+        protect_aliased = st.checkbox(
+            "never delete aliased indices", value=policy.protect_aliased
+        )
+        exclude_patterns = st.text_input(
+            "exclude patterns (comma separated)",
+            value=",".join(policy.exclude_patterns),
+        )
+        # family를 나누는 이름 규칙 (prefix, suffix group을 가진 정규식)
+        naming_pattern = st.text_input(
+            "index naming rule", value=policy.naming_rule.pattern
+        )
+        try:
+            NamingRule(naming_pattern)
+        except (re.error, ValueError) as e:
+            st.error(f"invalid naming rule: {e}")
+            naming_pattern = DEFAULT_NAMING_PATTERN
+        policy = RetentionPolicy(
+            keep_latest=keep_latest or None,
+            max_age_days=max_age_days or None,
+            protect_aliased=protect_aliased,
+            exclude_patterns=[p.strip() for p in exclude_patterns.split(",")],
+            naming_pattern=naming_pattern,
+        )
+        if st.button("save policy"):
+            save_policy(policy)
+            st.toast("Save complete!")
 
-    # 우측 컬럼 UI
     with ui_col_right:
-        st.write("right column")
+        st.subheader("Plan (dry run)")
+        status, snapshot = load_snapshot(es_client, policy)
+        # st.stop()을 쓰면 아래 삭제 작업 진행 상황이 갱신되지 않으므로 분기로 처리
+        if not status:
+            st.error("Fail: load cluster snapshot")
+        else:
+            plan = plan_retention(snapshot, policy)
+            targets = delete_targets(plan)
+            delete_only = st.checkbox("show delete targets only", value=True)
+            plan_df = pd.DataFrame(plan)
+            if delete_only and len(plan_df) > 0:
+                plan_df = plan_df[plan_df["action"] == DELETE]
+            target_size = sum(
+                row["store_size"] or 0 for row in plan if row["action"] == DELETE
+            )
+            st.caption(
+                f"{len(targets)} / {len(plan)} indices to delete,"
+                f" {format_bytes(target_size)} to free"
+            )
+            st.dataframe(plan_df, hide_index=True, use_container_width=True)
+
+            if st.button("Apply retention", type="primary", disabled=len(targets) == 0):
+                confirm_delete(targets, es_client, policy)
+
+
+# 삭제 작업 진행 상황은 페이지를 모두 그린 후 갱신
+with ui_delete_job:
+    watch_delete_job()
@@ -4,10 +4,48 @@ import streamlit as st
 import pymongo as pm
 from functools import wraps
 import time
-from datetime import timedelta, datetime
+from datetime import timedelta
 import logging
 import json
-from app.db_api import csv2mongo, store2csv, store2json, json2mongo
+import uuid
+from sqlalchemy import text
+from app.db_api import (
+    csv2mongo,
+    store2csv,
+    store2json,
+    json2mongo,
+    rdb2mongo,
+    rdb2mongo_delta,
+    get_staging_collection,
+    swap_collection,
+    create_indexes,
+    csvfile2mongo,
+    store_upload,
+)
+from app.checkpoint import Checkpoint, list_checkpoints
+from app.jobs import DEFAULT_POLL_INTERVAL, FAILED as JOB_FAILED
+from app.rdb import rdb_dsn
+from app.spans import (
+    DEFAULT_SPAN_REPORT_TTL,
+    read_spans,
+    span_log_version,
+    throughput_report,
+)
+from app.resources import (
+    init_job_owner,
+    init_job_runner,
+    init_rdb_engine,
+    init_temp_manager,
+)
+from app.migration import (
+    DEFAULT_INDEX_WORKERS,
+    DEFAULT_MAX_PER_HOST,
+    DEFAULT_MAX_WORKERS,
+    DONE,
+    FAILED,
+    MigrationJob,
+    MigrationScheduler,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +58,17 @@ st.set_page_config(
 if "file_list" not in st.session_state:
     st.session_state.file_list = []
 
+# session 별 temp 하위 디렉토리 (다른 session의 파일과 겹치지 않도록)
+if "temp_job_id" not in st.session_state:
+    st.session_state.temp_job_id = uuid.uuid4().hex
+    st.session_state.stored_uploads = set()
+
+temp_manager = init_temp_manager()
+job_runner = init_job_runner()
+job_owner = init_job_owner()
+# 현재 session과 실행 중인 작업(새로고침 전 session 포함)이 읽는 파일은 지우지 않음
+temp_manager.evict(protect=(st.session_state.temp_job_id, *job_runner.temp_job_ids()))
+
 # 경로 설정이 안된 경우 index페이지에서 진행
 if "streamlit_path" not in st.session_state:
     st.switch_page("index.py")
@@ -61,12 +110,13 @@ def upload_csv_data(file_name, _type: list[str] = ["csv"]):
         type=_type,
         accept_multiple_files=False,
     )
-    path = os.path.join(st.session_state.temp_path, f"{file_name}_{datetime.now()}.csv")
+    path = temp_manager.new_path(
+        f"{file_name}.csv", job_id=st.session_state.temp_job_id
+    )
     if uploaded_file is not None:
         logger.info(f"{path} file is uploaded")
         try:
-            with open(path, "wb") as f:
-                f.write(uploaded_file.getvalue())
+            store_upload(uploaded_file, path)
         except Exception as e:
             # st.switch_page("pages/MongoDB_Importer.py")
             st.error(e)
@@ -180,12 +230,6 @@ def csv2mongo_w_time(path, schema, db, user, pw, host, port, collection):
     )
 
 
-@return_processing_time
-def create_index(collection, indexes):
-    for index in indexes:
-        collection.create_index(index)
-
-
 # pymongo client 연결
 @st.cache_resource
 def init_connection(mongodb_host, mongodb_port, mongodb_username, mongodb_password):
@@ -198,8 +242,9 @@ def init_connection(mongodb_host, mongodb_port, mongodb_username, mongodb_passwo
 
 
 @return_processing_time
-def get_data_from_rdb(conn, query, show=False) -> pd.DataFrame:
-    df = conn.query(query, ttl=60 * 30)
+def get_data_from_rdb(engine, query, show=False) -> pd.DataFrame:
+    with engine.connect() as conn:
+        df = pd.read_sql(text(query), conn)
     if show:
         st.dataframe(df.head(5))
     return df
@@ -231,14 +276,24 @@ with st.container():
         type=["csv"],
         accept_multiple_files=False,
     )
+    upload_compression = st.selectbox(
+        "temp file compression", [None, "gzip", "zstd"], index=1
+    )
 
     if uploaded_file is not None:
-        path = os.path.join(st.session_state.temp_path, f"{uploaded_file.name}")
+        path = temp_manager.new_path(
+            uploaded_file.name,
+            job_id=st.session_state.temp_job_id,
+            compression=upload_compression,
+            unique=False,
+        )
         st.session_state.file_list.append(uploaded_file.name)
         try:
-            with open(path, "wb") as f:
-                f.write(uploaded_file.getvalue())
-            logger.info(f"{path} file is uploaded")
+            # rerun 마다 같은 파일을 다시 저장하지 않도록 함
+            if (uploaded_file.file_id, path) not in st.session_state.stored_uploads:
+                store_upload(uploaded_file, path)
+                st.session_state.stored_uploads.add((uploaded_file.file_id, path))
+                logger.info(f"{path} file is uploaded")
             st.table(set(st.session_state.file_list))
         except Exception as e:
             # st.switch_page("pages/MongoDB_Importer.py")
@@ -251,9 +306,34 @@ def json2dataframe(json_data):
     return pd.DataFrame([x for x in json_data.values()])
 
 
+# mongo_schema.json에서 선택적으로 지정하는 값 (없으면 None)
+def schema_option(row, key):
+    value = row.get(key)
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    return value
+
+
+# row의 rdb_* 설정으로 DSN 생성 (같은 DSN은 같은 engine/pool 사용)
+def row_dsn(row):
+    return rdb_dsn(
+        row["rdb_username"],
+        row["rdb_password"],
+        row["rdb_host"],
+        row["rdb_port"],
+        row["rdb_db"],
+    )
+
+
 # mongoschema 파일에서 기본정보 로딩
 df = json2dataframe(st.session_state.mongo_schema)
 
+# delta sync 설정 (sync_mode: "full" | "delta")
+for col in ["sync_mode", "delta_key", "primary_key", "delta_watermark"]:
+    if col not in df.columns:
+        df[col] = None
+df["sync_mode"] = df["sync_mode"].fillna("full")
+
 
 # import정보 수정 테이블
 edited_df = st.data_editor(
@@ -269,6 +349,10 @@ edited_df = st.data_editor(
             "rdb_db",
             "rdb_username",
             "rdb_password",
+            "sync_mode",
+            "delta_key",
+            "primary_key",
+            "delta_watermark",
         ]
     ],
     column_config={
@@ -291,6 +375,15 @@ edited_df = st.data_editor(
         "rdb_password": st.column_config.TextColumn(),
         "import": st.column_config.CheckboxColumn(),
         "schema": st.column_config.TextColumn(),
+        "sync_mode": st.column_config.SelectboxColumn(
+            "sync",
+            help="rdb 전체 재적재(full) 또는 변경분만 upsert(delta)",
+            width="small",
+            options=["full", "delta"],
+        ),
+        "delta_key": st.column_config.TextColumn(help="updated_at 또는 증가하는 key"),
+        "primary_key": st.column_config.TextColumn(help="upsert 기준 컬럼"),
+        "delta_watermark": st.column_config.TextColumn(disabled=True),
     },
     hide_index=True,
     height=600,
@@ -308,6 +401,8 @@ if st.button("save config"):
             "rdb_password",
         ]:
             st.session_state.mongo_schema[key][conf] = row[conf]
+        for conf in ["sync_mode", "delta_key", "primary_key"]:
+            st.session_state.mongo_schema[key][conf] = schema_option(row, conf)
 
     with open(mongo_schema_path, "w") as g:
         json.dump(st.session_state.mongo_schema, g, indent=2, ensure_ascii=False)
@@ -322,20 +417,155 @@ if st.button("RDB Connection Check"):
         if row["data_source"] == "rdb":
             collection = row["collection"]
             query = row["query"] + " limit 5"
-            conn = st.connection(
-                "rdb",
-                type="sql",
-                url=f"mariadb://{row['rdb_username']}:{row['rdb_password']}@{row['rdb_host']}:{row['rdb_port']}/{row['rdb_db']}",
-            )
-            _, data = get_data_from_rdb(conn, query=query)
+            engine = init_rdb_engine(row_dsn(row))
+            _, data = get_data_from_rdb(engine, query=query)
             if len(data) > 0:
                 # df[df["collection"] == collection]["conn_check"] = True
                 df.iloc[i]["conn_check"] = True
                 st.toast(f"✅ {collection}: DB connection is OK! ")
             else:
-                st.warning(
-                    f"{collection}: DB connection is failed.\n mariadb://{row['rdb_username']}:{row['rdb_password']}@{row['rdb_host']}:{row['rdb_port']}/{row['rdb_db']}\n {conn}"
-                )
+                st.warning(f"{collection}: DB connection is failed.\n {engine.url}")
+
+
+with st.expander(label="migration options"):
+    max_workers = st.number_input(
+        "max concurrent imports", min_value=1, value=DEFAULT_MAX_WORKERS
+    )
+    max_per_host = st.number_input(
+        "max concurrent imports per RDB host", min_value=1, value=DEFAULT_MAX_PER_HOST
+    )
+    index_workers = st.number_input(
+        "max concurrent index builds", min_value=1, value=DEFAULT_INDEX_WORKERS
+    )
+    blue_green = st.checkbox(
+        "blue/green reload",
+        help="staging collection에 적재/index 생성 후 기존 collection과 교체 (delta sync 제외)",
+    )
+
+
+def make_csv_import(path, schema, collection):
+    def import_fn(progress_callback):
+        return csvfile2mongo(
+            path,
+            collection=collection,
+            schema=schema,
+            progress_callback=progress_callback,
+        )
+
+    return import_fn
+
+
+def make_rdb_import(engine, query, schema, collection, checkpoint=None):
+    def import_fn(progress_callback):
+        return rdb2mongo(
+            engine=engine,
+            query=query,
+            collection=collection,
+            schema=schema,
+            progress_callback=progress_callback,
+            checkpoint=checkpoint,
+        )
+
+    return import_fn
+
+
+def make_index_fn(collection, indexes, swap_to=None):
+    def index_fn():
+        report = create_indexes(collection, indexes)
+        # blue/green: index까지 만들어진 staging collection을 교체
+        if swap_to is not None:
+            swap_collection(collection, swap_to)
+        return report
+
+    return index_fn
+
+
+def make_rdb_delta_import(
+    engine, query, schema, collection, delta_key, primary_key, watermark, results
+):
+    def import_fn(progress_callback):
+        count, results[collection.name] = rdb2mongo_delta(
+            engine=engine,
+            query=query,
+            collection=collection,
+            delta_key=delta_key,
+            primary_key=primary_key,
+            watermark=watermark,
+            schema=schema,
+            progress_callback=progress_callback,
+        )
+        return count
+
+    return import_fn
+
+
+# background thread에서 호출되므로 session_state 대신 파일을 다시 읽어 watermark만 반영
+def save_delta_watermarks(path, watermarks):
+    with open(path, "r", encoding="utf-8") as f:
+        mongo_schema = json.load(f)
+    for collection, watermark in watermarks.items():
+        mongo_schema[collection]["delta_watermark"] = watermark
+    with open(path, "w") as g:
+        json.dump(mongo_schema, g, indent=2, ensure_ascii=False)
+
+
+# background job: scheduler로 migration 작업을 실행하고 결과를 반환
+def run_migration(
+    job, migration_jobs, scheduler_options, mongo_schema_path, delta_watermarks
+):
+    # background job id를 span log의 run_id로 사용
+    scheduler = MigrationScheduler(**scheduler_options, run_id=job.id)
+    job.data["scheduler"] = scheduler
+    for migration_job in migration_jobs:
+        scheduler.submit(migration_job)
+
+    while not scheduler.wait(timeout=0.5):
+        finished = sum(m.state in (DONE, FAILED) for m in scheduler.jobs)
+        job.update(finished / len(scheduler.jobs), f"{finished}/{len(scheduler.jobs)}")
+    scheduler.shutdown()
+
+    if len(delta_watermarks) > 0:
+        save_delta_watermarks(mongo_schema_path, delta_watermarks)
+
+    return {
+        "index_report": scheduler.index_report(),
+        "delta_watermarks": delta_watermarks,
+        "failed": [m.name for m in scheduler.jobs if m.state == FAILED],
+    }
+
+
+# span log 파일이 바뀐 경우에만 다시 읽고 집계 (log_version: 파일 별 수정 시각, 크기)
+@st.cache_data(ttl=DEFAULT_SPAN_REPORT_TTL, show_spinner=False)
+def load_span_report(log_version):
+    span_report = pd.DataFrame(throughput_report(read_spans()))
+    if len(span_report) == 0:
+        return span_report, None
+    span_report = span_report[span_report["collection"].notna()]
+    span_report = span_report.sort_values("ts", ascending=False)
+    # run 별 import 처리량 추이 (collection 별)
+    import_trend = span_report[span_report["stage"] == "import"].pivot_table(
+        index="ts", columns="collection", values="rows_per_sec"
+    )
+    return span_report, import_trend
+
+
+# 지난 migration들의 stage 별 처리량 (logs/spans.jsonl)
+with st.expander(label="migration performance report"):
+    span_report, import_trend = load_span_report(span_log_version())
+    if len(span_report) == 0:
+        st.write("No migration spans")
+    else:
+        st.dataframe(span_report, hide_index=True, use_container_width=True)
+        st.line_chart(import_trend)
+
+
+# 이전에 실패한 import가 있으면 checkpoint부터 이어서 진행할지 선택
+checkpoint_list = [c for c in list_checkpoints() if c["db"] == mongo_db_name]
+resume = False
+if len(checkpoint_list) > 0:
+    st.warning("Unfinished imports exist.")
+    st.dataframe(pd.DataFrame(checkpoint_list), hide_index=True)
+    resume = st.checkbox("Resume from last checkpoint", value=True)
 
 
 if st.button("Migrate to MongoDB", type="primary"):
@@ -344,73 +574,176 @@ if st.button("Migrate to MongoDB", type="primary"):
     selected_df = df[df["import"]]
     csv_df = selected_df[selected_df["data_source"] == "csv"]
     rdb_df = selected_df[selected_df["data_source"] == "rdb"]
-    processing_time_list = []
+    mongo_db = st.session_state.mongo_client.get_database(mongo_db_name)
+    migration_jobs = []
+    # delta sync 작업의 새 watermark (collection -> 값)
+    delta_watermarks = {}
+
+    for i, row in csv_df.iterrows():
+        if blue_green:
+            target_collection = get_staging_collection(mongo_db, row["collection"])
+        else:
+            target_collection = mongo_db.get_collection(row["collection"])
+        import_fn = make_csv_import(
+            temp_manager.find(row["query"], job_id=st.session_state.temp_job_id),
+            row["schema"],
+            target_collection,
+        )
+        migration_jobs.append(
+            MigrationJob(
+                row["collection"],
+                import_fn,
+                index_fn=make_index_fn(
+                    target_collection,
+                    row["index"],
+                    swap_to=row["collection"] if blue_green else None,
+                ),
+            )
+        )
+
+    for i, row in rdb_df.iterrows():
+        engine = init_rdb_engine(row_dsn(row))
+        target_collection = mongo_db.get_collection(row["collection"])
+        if schema_option(row, "sync_mode") == "delta":
+            import_fn = make_rdb_delta_import(
+                engine,
+                row["query"],
+                row["schema"],
+                target_collection,
+                delta_key=row["delta_key"],
+                primary_key=row["primary_key"],
+                watermark=schema_option(row, "delta_watermark"),
+                results=delta_watermarks,
+            )
+            migration_jobs.append(
+                MigrationJob(
+                    row["collection"],
+                    import_fn,
+                    index_fn=make_index_fn(target_collection, row["index"]),
+                    host=f"{row['rdb_host']}:{row['rdb_port']}",
+                )
+            )
+            continue
+
+        if blue_green:
+            target_collection = get_staging_collection(
+                mongo_db, row["collection"], drop=False
+            )
+        # checkpoint_key(unique 컬럼)가 없으면 이어서 진행할 수 없으므로 처음부터 적재
+        checkpoint = None
+        checkpoint_key = schema_option(row, "checkpoint_key")
+        if checkpoint_key:
+            checkpoint = Checkpoint(
+                mongo_db_name, target_collection.name, key=checkpoint_key
+            )
+            if resume:
+                checkpoint.load()
+            else:
+                checkpoint.clear()
+        # 이어서 진행할 checkpoint가 있는 경우에만 적재 중이던 staging collection을 사용
+        if blue_green and (checkpoint is None or not checkpoint.exists()):
+            target_collection.drop()
+        import_fn = make_rdb_import(
+            engine,
+            row["query"],
+            row["schema"],
+            target_collection,
+            checkpoint=checkpoint,
+        )
+        migration_jobs.append(
+            MigrationJob(
+                row["collection"],
+                import_fn,
+                index_fn=make_index_fn(
+                    target_collection,
+                    row["index"],
+                    swap_to=row["collection"] if blue_green else None,
+                ),
+                host=f"{row['rdb_host']}:{row['rdb_port']}",
+            )
+        )
+
+    if len(migration_jobs) > 0:
+        st.session_state.migrate_job_id = job_runner.submit(
+            "migrate",
+            f"mongodb.{mongo_db_name}",
+            run_migration,
+            migration_jobs,
+            dict(
+                max_workers=max_workers,
+                max_per_host=max_per_host,
+                index_workers=index_workers,
+            ),
+            mongo_schema_path,
+            delta_watermarks,
+            owner=job_owner,
+            temp_job_id=st.session_state.temp_job_id,
+        )
+    else:
+        st.error("import할 collection을 선택해주세요.")
+
+
+# 새로고침 등으로 session이 바뀐 경우 이 tab의 마지막 migration을 다시 표시
+if "migrate_job_id" not in st.session_state:
+    last_job = job_runner.latest("migrate", job_owner)
+    if last_job is not None:
+        st.session_state.migrate_job_id = last_job.id
+
+
+# 실행 중에는 진행 상황만 주기적으로 다시 그림 (페이지 전체는 rerun 하지 않음)
+@st.experimental_fragment(run_every=DEFAULT_POLL_INTERVAL)
+def poll_migrate_job(job_id):
+    job = job_runner.get(job_id)
+    if job is None or job.finished:
+        # 끝나면 페이지 전체를 한번 rerun하여 결과 표시
+        st.rerun()
+    with st.status(f"Migrate to {job.title} ... (job: {job.id})", expanded=True):
+        scheduler = job.data.get("scheduler")
+        if scheduler is not None:
+            st.dataframe(pd.DataFrame(scheduler.status()), hide_index=True)
+
+
+migrate_job = job_runner.get(st.session_state.get("migrate_job_id"))
+if migrate_job is not None and not migrate_job.finished:
+    poll_migrate_job(migrate_job.id)
+elif migrate_job is not None:
     with st.status(
-        f"Migrate to mongodb.{mongo_db_name} ...",
+        f"Migrate to {migrate_job.title} ... (job: {migrate_job.id})",
         expanded=True,
     ) as status:
-        for i, row in csv_df.iterrows():
-            mongo_collection_name = row["collection"]
-
-            st.write("start: Importing into mongodb...")
-            processing_time, reuslt = csv2mongo_w_time(
-                os.path.join(st.session_state.temp_path, row["query"]),
-                schema=row["schema"],
-                db=mongo_db_name,
-                user=mongodb_username,
-                pw=mongodb_password,
-                host=mongodb_host,
-                port=mongodb_port,
-                collection=mongo_collection_name,
+        scheduler = migrate_job.data.get("scheduler")
+        if scheduler is not None:
+            st.dataframe(pd.DataFrame(scheduler.status()), hide_index=True)
+
+        result = migrate_job.result or {}
+        if len(result.get("index_report", [])) > 0:
+            st.write("Index build report")
+            st.dataframe(pd.DataFrame(result["index_report"]), hide_index=True)
+
+        if len(result.get("delta_watermarks", {})) > 0:
+            st.write(f"Save delta watermarks: {result['delta_watermarks']}")
+            # 파일에 저장된 watermark를 화면의 schema에도 한번만 반영 (표를 다시 그림)
+            if st.session_state.get("migrate_job_merged") != migrate_job.id:
+                st.session_state.migrate_job_merged = migrate_job.id
+                for collection, watermark in result["delta_watermarks"].items():
+                    st.session_state.mongo_schema[collection][
+                        "delta_watermark"
+                    ] = watermark
+                st.rerun()
+
+        total_time = migrate_job.elapsed
+        if migrate_job.state == JOB_FAILED:
+            status.update(
+                label=f"Migration failed: {migrate_job.error}  total time: {total_time}",
+                state="error",
             )
-            processing_time_list.append(processing_time)
-            st.write(f"Finish: Importing into mongodb... ({processing_time}).")
-
-            st.write("Start: Create index")
-            target_collection = st.session_state.mongo_client.get_database(
-                mongo_db_name
-            ).get_collection(mongo_collection_name)
-            processing_time, _ = create_index(target_collection, row["index"])
-            processing_time_list.append(processing_time)
-            st.write("Finish: Create index")
-
-        for i, row in rdb_df.iterrows():
-            conn = st.connection(
-                "rdb",
-                type="sql",
-                url=f"mariadb://{row['rdb_username']}:{row['rdb_password']}@{row['rdb_host']}:{row['rdb_port']}/{row['rdb_db']}",
+        elif len(result["failed"]) > 0:
+            status.update(
+                label=f"Migration failed for {result['failed']}  total time: {total_time}",
+                state="error",
             )
-            mongo_collection_name = row["collection"]
-            st.write("Start: Fetching from RDB...")
-            processing_time, data = get_data_from_rdb(conn, row["query"])
-            st.write(f"Finish: Fetching from RDB... ({processing_time}).")
-            processing_time_list.append(processing_time)
-            st.write("Start: Storing to temp file...")
-            processing_time, path = store2csv_w_time(data, row["schema"])
-            st.write(f"Finish: Storing to temp file(path)... ({processing_time}).")
-            processing_time_list.append(processing_time)
-            st.write(f"Start: Importing into mongodb.{row['collection']}...")
-            processing_time, reuslt = csv2mongo_w_time(
-                path,
-                schema=row["schema"],
-                db=mongo_db_name,
-                user=mongodb_username,
-                pw=mongodb_password,
-                host=mongodb_host,
-                port=mongodb_port,
-                collection=mongo_collection_name,
+        else:
+            status.update(
+                label=f"Migrating complete  total time: {total_time}",
+                state="complete",
             )
-            st.write(f"Finish: Importing into mongodb... ({processing_time}).")
-            processing_time_list.append(processing_time)
-            st.write("Start: Create index")
-            target_collection = st.session_state.mongo_client.get_database(
-                mongo_db_name
-            ).get_collection(mongo_collection_name)
-            processing_time, _ = create_index(target_collection, row["index"])
-            processing_time_list.append(processing_time)
-            st.write("Finish: Create index")
-
-        status.update(
-            label=f"Migrating for csv complete  total time: {sum(processing_time_list, timedelta())}",
-            state="complete",
-        )